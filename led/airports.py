@@ -1,7 +1,9 @@
 import os
 import time
-from constants import BLACK, FLIGHT_CATEGORY_TO_COLOR, WHITE, WIND_BLINK_THRESHOLD
-from sun_calculator import SunCalculator
+from constants import BLACK, FADE_DURATION, LIGHTNING_BLINK, STALE_DATA_AGE, STALE_LEVEL, WIND_BLINK_THRESHOLD
+from brightness_service import get_brightness_service
+from color_lut import COLOR_LUT, MAX_LEVEL, brightness_level, color_index_for, combine_levels, fade_level
+from frame_clock import fade_phase, phase_offset_for
 
 class AirportLED:
     def __init__(self, strip, pixel_index, airport_code, metar_info):
@@ -10,85 +12,87 @@ class AirportLED:
         self.airport_code = airport_code
         self.metar_info = metar_info
 
-        if self.metar_info is None:
-            self.sun_calculator = None
-        else:
-            self.sun_calculator = SunCalculator(
-                self.metar_info.latitude,
-                self.metar_info.longitude
-            )
+        self.brightness_service = get_brightness_service()
+        self.brightness_slot = None
+        self._update_brightness_slot()
         self._color = BLACK
+        self.stale = False  # Observation too old to trust at full brightness
 
-        # Fade state tracking
+        # Fade state — the fade position itself comes from the shared frame clock
         self.should_fade = False
-        self.fade_start_time = 0
-        self.fade_duration = 2.0  # seconds for each fade direction
-        self.fade_direction = 1  # 1 = fading to black, -1 = fading to color
+        self.fade_duration = FADE_DURATION  # seconds for each fade direction
+        self.phase_offset = phase_offset_for(airport_code)
 
     def __repr__(self):
         return f"AirportLED<{self.airport_code}>"
 
-    def determine_brightness(self, color):
-        """Apply brightness dimming based on time of day"""
-        if self.sun_calculator is None:
-            return color
-        
-        return self.sun_calculator.apply_brightness_to_color(color)
+    def _update_brightness_slot(self):
+        """Look up this airport's slot in the shared brightness service"""
+        if self.metar_info is None:
+            return
+        self.brightness_slot = self.brightness_service.register(
+            self.metar_info.latitude,
+            self.metar_info.longitude
+        )
+
+    def update_metar_info(self, metar_info):
+        """Apply a new observation in place. Returns True if anything changed.
+
+        Fades follow the shared frame clock, so a refresh never restarts one mid-cycle.
+        """
+        if not observation_changed(self.metar_info, metar_info):
+            return False
+        self.metar_info = metar_info
+        self._update_brightness_slot()
+        return True
 
-    def calculate_fade_color(self, base_color, current_time):
+    def update_staleness(self, now=None, max_age=STALE_DATA_AGE):
+        """Re-check whether the observation is older than `max_age`. Returns True if that changed."""
+        age = self.metar_info.age(now) if self.metar_info is not None else None
+        stale = age is not None and age > max_age
+        if stale == self.stale:
+            return False
+        self.stale = stale
+        return True
+
+    def get_brightness_level(self):
+        """Time-of-day brightness dimming (and stale data dimming) as a color LUT level.
+
+        Only reads the service's factors; FrameLoop.tick refreshes them once per frame.
+        """
+        return self.level_from_factors(self.brightness_service.factors)
+
+    def level_from_factors(self, factors):
+        """LUT level for this airport given the brightness service's current factors"""
+        level = MAX_LEVEL if self.brightness_slot is None else brightness_level(factors[self.brightness_slot])
+        if self.stale:
+            level = combine_levels(level, STALE_LEVEL)
+        return level
+
+    def calculate_fade_level(self, current_time):
+        """Color LUT level for the current point in the fade (MAX_LEVEL when not fading)"""
         if not self.should_fade:
-            return base_color
-            
-        elapsed = current_time - self.fade_start_time
-        
-        # Check if we need to switch direction
-        if elapsed >= self.fade_duration:
-            self.fade_direction *= -1  # Flip direction
-            self.fade_start_time = current_time
-            elapsed = 0
-        
-        # Calculate fade progress (0 to 1)
-        progress = elapsed / self.fade_duration
-        
-        if self.fade_direction == 1:
-            # Fading from base_color to black
-            start_color = base_color
-            end_color = BLACK
-        else:
-            # Fading from black to base_color
-            start_color = BLACK
-            end_color = base_color
-        
-        # Interpolate between colors
-        red_value = int(start_color[1] + (end_color[1] - start_color[1]) * progress)
-        green_value = int(start_color[0] + (end_color[0] - start_color[0]) * progress)
-        blue_value = int(start_color[2] + (end_color[2] - start_color[2]) * progress)
-        
-        return (green_value, red_value, blue_value)
+            return MAX_LEVEL
 
-    def get_color(self):
+        # 1 = fading from base color to black, -1 = fading from black to base color
+        progress, direction = fade_phase(current_time, self.phase_offset, self.fade_duration)
+        return fade_level(progress, direction)
+
+    def get_color(self, now=None):
+        """Color for frame time `now` (from the FrameClock; sampled here if not given)"""
+        if now is None:
+            now = time.time()
         if self.metar_info is None:
             return self._color
         if self.metar_info.flightCategory is None:
             return self._color
 
-        base_color = FLIGHT_CATEGORY_TO_COLOR.get(
-            self.metar_info.flightCategory, WHITE
-        )
-        base_color = self.determine_brightness(base_color)
-
-        should_fade = self.metar_info.windGustSpeed >= WIND_BLINK_THRESHOLD
-        
-        # Start or stop fading based on wind conditions
-        if should_fade and not self.should_fade:
-            self.should_fade = True
-            self.fade_start_time = time.time()
-            self.fade_direction = 1
-        elif not should_fade:
-            self.should_fade = False
+        # Start or stop fading based on wind gusts and lightning
+        self.should_fade = wants_fade(self.metar_info)
         
-        # Calculate the current color (static or fading)
-        return self.calculate_fade_color(base_color, time.time())
+        # Calculate the current color (static or fading) with a single table lookup
+        level = combine_levels(self.get_brightness_level(), self.calculate_fade_level(now))
+        return COLOR_LUT.color(color_index_for(self.metar_info), level)
     
     def get_static_color(self):
         if self.metar_info is None:
@@ -96,15 +100,45 @@ class AirportLED:
         if self.metar_info.flightCategory is None:
             return self._color
 
-        new_color = FLIGHT_CATEGORY_TO_COLOR.get(
-            self.metar_info.flightCategory, WHITE
-        )
-        return self.determine_brightness(new_color)
+        return COLOR_LUT.color(color_index_for(self.metar_info), self.get_brightness_level())
 
-    def set_pixel_color(self):
-        self.strip[self.pixel_index] = self.get_color()
+    def set_pixel_color(self, now=None):
+        self.strip[self.pixel_index] = self.get_color(now)
         
 
+def wants_fade(metar_info):
+    """True when a station's weather calls for the fading effect: strong gusts or lightning"""
+    return (
+        metar_info.windGustSpeed >= WIND_BLINK_THRESHOLD or
+        (LIGHTNING_BLINK and metar_info.lightning)
+    )
+
+
+def observation_changed(old, new):
+    """True when two MetarInfo objects (either may be None) describe different observations"""
+    if old is None or new is None:
+        return old is not new
+    return (
+        old.observation_time != new.observation_time or
+        old.flightCategory != new.flightCategory or
+        old.windGustSpeed != new.windGustSpeed or
+        old.latitude != new.latitude or
+        old.longitude != new.longitude
+    )
+
+
+def update_airport_leds(airport_leds, metar_infos):
+    """Apply a new MetarInfos to existing LEDs, touching only stations whose observation changed.
+
+    Returns the list of LED indices that were updated.
+    """
+    changed = []
+    for airport_led in airport_leds:
+        if airport_led.update_metar_info(metar_infos.get(airport_led.airport_code)):
+            changed.append(airport_led.pixel_index)
+    return changed
+
+
 def get_airport_codes():
     dir_path = os.path.dirname(os.path.realpath(__file__))
     with open(os.path.join(dir_path, 'airports')) as f:
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Render-loop benchmark — runs the real FrameLoop against a VirtualStrip with
+synthetic weather, so frame cost can be measured without a Pi or network.
+Run with: python3 benchmark.py [--leds 249 1000 5000] [--frames 500]
+
+Ticks run back to back with the frame clock stepped by MAIN_LOOP_DELAY each
+frame, as if the loop slept between them. Reports frames per second, per-frame
+compute time and how many frames were actually pushed to the strip. LEDs run
+at full brightness unless --live-brightness is given, so results don't depend
+on the time of day.
+"""
+
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from airports import AirportLED
+from constants import FLIGHT_CATEGORY_TO_COLOR, MAIN_LOOP_DELAY, WIND_BLINK_THRESHOLD
+from frame_loop import FrameLoop
+from metar_data import MetarInfo, MetarInfos
+from virtual_strip import VirtualStrip
+
+DEFAULT_LED_COUNTS = [249, 1000, 5000]
+
+
+def synthetic_metar_infos(count, gust_ratio=0.2, seed=0):
+    """MetarInfos for `count` made-up stations spread over the continental US"""
+    rng = random.Random(seed)
+    categories = list(FLIGHT_CATEGORY_TO_COLOR)
+    observation_time = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+
+    metar_infos = MetarInfos()
+    for index in range(count):
+        code = f"X{index:04d}"
+        gust = WIND_BLINK_THRESHOLD + rng.randint(0, 20) if rng.random() < gust_ratio else 0
+        metar_infos[code] = MetarInfo(
+            code, rng.choice(categories), "270", 10, gust, False, False,
+            20, 10, 10, 30.0, "", [],
+            round(rng.uniform(25.0, 49.0), 2), round(rng.uniform(-124.0, -67.0), 2),
+            observation_time,
+        )
+    return metar_infos
+
+
+def run_benchmark(led_count, frames, use_engine=True, gust_ratio=0.2, live_brightness=False):
+    metar_infos = synthetic_metar_infos(led_count, gust_ratio)
+    strip = VirtualStrip(led_count, max_frames=0)
+    airport_leds = [AirportLED(strip, index, code, None) for index, code in enumerate(metar_infos)]
+    frame_loop = FrameLoop(strip, airport_leds, use_engine=use_engine)
+    frame_loop.update(metar_infos)
+    if not live_brightness:
+        for airport_led in airport_leds:
+            airport_led.brightness_slot = None
+        if frame_loop.engine is not None:
+            frame_loop.engine.refresh_brightness()
+
+    # Warm-up frame: first brightness refresh and buffer setup
+    clock_start = time.time()
+    frame_loop.tick(clock_start)
+    frame_loop.show_count = strip.show_count = 0
+
+    frame_times = []
+    start = time.perf_counter()
+    for frame in range(1, frames + 1):
+        frame_start = time.perf_counter()
+        frame_loop.tick(clock_start + frame * MAIN_LOOP_DELAY)
+        frame_times.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+
+    frame_times.sort()
+    return {
+        "leds": led_count,
+        "fps": frames / elapsed,
+        "mean_ms": statistics.fmean(frame_times) * 1000,
+        "p95_ms": frame_times[int(len(frame_times) * 0.95)] * 1000,
+        "shows": strip.show_count,
+        "frames": frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LED render loop on a virtual strip")
+    parser.add_argument("--leds", type=int, nargs="+", default=DEFAULT_LED_COUNTS, help="LED counts to run")
+    parser.add_argument("--frames", type=int, default=500, help="Frames per run")
+    parser.add_argument("--gust-ratio", type=float, default=0.2, help="Fraction of stations fading")
+    parser.add_argument("--live-brightness", action="store_true", help="Use the real time-of-day brightness")
+    parser.add_argument("--per-led", action="store_true", help="Use the per-AirportLED path instead of the frame engine")
+    args = parser.parse_args()
+
+    path = "per-LED" if args.per_led else "frame engine"
+    print(f"Render loop benchmark ({path}, {args.frames} frames, {args.gust_ratio:.0%} gusting)\n")
+    print(f"{'LEDs':>6} {'FPS':>10} {'mean ms':>9} {'p95 ms':>9} {'shows':>7}")
+    print("-" * 45)
+    for led_count in args.leds:
+        result = run_benchmark(led_count, args.frames, use_engine=not args.per_led, gust_ratio=args.gust_ratio,
+                               live_brightness=args.live_brightness)
+        print(f"{result['leds']:>6} {result['fps']:>10.1f} {result['mean_ms']:>9.3f} "
+              f"{result['p95_ms']:>9.3f} {result['shows']:>4}/{result['frames']}")
+
+
+if __name__ == "__main__":
+    main()
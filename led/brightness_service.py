@@ -0,0 +1,229 @@
+import datetime
+import math
+import threading
+import time
+from array import array
+
+import astral
+from astral.sun import sun as AstralSun
+
+from constants import BRIGHTNESS_COORD_PRECISION
+
+try:
+    import numpy as np
+except ImportError:  # Plain list fallback on installs without NumPy
+    np = None
+
+# Factor between dusk and dawn (and the floor of the ramps either side of noon)
+MIN_BRIGHTNESS = 0.01
+MINUTES_PER_DAY = 24 * 60
+SECONDS_PER_DAY = 24 * 60 * 60
+# Start building the next UTC day's curves on a background thread this many
+# minutes before midnight, so the render loop never waits for them
+PREBUILD_MINUTES = 60
+
+
+def local_date_for(longitude, current_time):
+    """Approximate local calendar date at a longitude (15 degrees per hour)"""
+    timezone_offset_hours = longitude / 15
+    local_time = current_time + datetime.timedelta(hours=timezone_offset_hours)
+    return local_time.date()
+
+
+class BrightnessService:
+    """Process-wide source of time-of-day brightness factors for every airport.
+
+    Airports register their position and get back a slot. Positions are rounded
+    to BRIGHTNESS_COORD_PRECISION decimal places, so nearby airports share a slot
+    and its astral results. Once per UTC day the service builds a brightness
+    curve for every slot at one-minute resolution (MINUTES_PER_DAY float32
+    entries per slot in one flat array), so reading a factor is a single index.
+    The next day's curves are built on a background thread during the last
+    PREBUILD_MINUTES of the day.
+    The shared `factors` array is refreshed from the curves when the minute
+    changes; `version` increases with every refresh so readers can tell when
+    to re-read it.
+    """
+
+    def __init__(self, precision=BRIGHTNESS_COORD_PRECISION):
+        self.precision = precision
+
+        self._slots = {}          # (lat, lon) rounded -> slot
+        self._positions = []      # slot -> (lat, lon) rounded
+        self.factors = array('d')  # slot -> current brightness factor
+        self.version = 0
+
+        self._sun_times = {}  # local date -> [sun times per slot]
+        self._curves = {}     # UTC date -> array('f') of MINUTES_PER_DAY factors per slot
+        self._refreshed_minute = None
+        self._build_lock = threading.Lock()
+        self._prebuild_thread = None
+
+    def register(self, latitude, longitude):
+        """Slot for an airport position, creating one the first time it is seen"""
+        key = (round(latitude, self.precision), round(longitude, self.precision))
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._positions)
+            self._slots[key] = slot
+            self._positions.append(key)
+            self.factors.append(1.0)
+            # Make the next read compute this slot's factor
+            self._refreshed_minute = None
+        return slot
+
+    def _sun_times_for(self, local_date):
+        """Sun times for every slot on a date, computed as one batch the first time it's asked for"""
+        batch = self._sun_times.get(local_date)
+        if batch is None or len(batch) < len(self._positions):
+            batch = batch or []
+            for latitude, longitude in self._positions[len(batch):]:
+                observer = astral.Observer(latitude=latitude, longitude=longitude)
+                try:
+                    batch.append(AstralSun(observer, date=local_date, tzinfo=datetime.timezone.utc))
+                except ValueError:
+                    # Sun never rises or sets (polar day/night) — leave at full brightness
+                    batch.append(None)
+            self._sun_times[local_date] = batch
+            # Keep only the days around the one being asked for
+            for stale_date in [d for d in self._sun_times if abs((d - local_date).days) > 2]:
+                del self._sun_times[stale_date]
+        return batch
+
+    def _curve_for(self, utc_date):
+        """Per-minute brightness curves for every slot on a UTC date, built once per day"""
+        curve = self._curves.get(utc_date)
+        if curve is not None and len(curve) == len(self._positions) * MINUTES_PER_DAY:
+            return curve
+
+        with self._build_lock:
+            # A background prebuild may have finished while we waited
+            curve = self._curves.get(utc_date)
+            if curve is None:
+                curve = array('f')
+            day_start = datetime.datetime.combine(utc_date, datetime.time(), tzinfo=datetime.timezone.utc)
+            for slot in range(len(curve) // MINUTES_PER_DAY, len(self._positions)):
+                values = self._build_curve(slot, day_start)
+                if np is not None:
+                    curve.frombytes(values.tobytes())
+                else:
+                    curve.extend(values)
+            self._curves[utc_date] = curve
+            # Keep the day before (still current in the moments around midnight) and anything after
+            for stale_date in [d for d in self._curves if d < utc_date - datetime.timedelta(days=1)]:
+                del self._curves[stale_date]
+        return curve
+
+    def _prebuild(self, utc_date):
+        """Build a day's curves on a background thread, unless they're built or being built"""
+        if utc_date in self._curves or (self._prebuild_thread is not None and self._prebuild_thread.is_alive()):
+            return
+        self._prebuild_thread = threading.Thread(
+            target=self._curve_for, args=(utc_date,), name="brightness-prebuild", daemon=True
+        )
+        self._prebuild_thread.start()
+
+    def _build_curve(self, slot, day_start):
+        """MINUTES_PER_DAY brightness factors for one slot, using float seconds instead of datetimes.
+
+        Dark (MIN_BRIGHTNESS) outside dawn to dusk, ramping up linearly to full
+        brightness at solar noon and back down to dusk.
+        """
+        _latitude, longitude = self._positions[slot]
+        day_start_ts = day_start.timestamp()
+        offset_seconds = longitude / 15 * 3600
+
+        values = np.ones(MINUTES_PER_DAY, dtype=np.float32) if np is not None else [1.0] * MINUTES_PER_DAY
+        # Each minute uses the sun times of the airport's local date at that moment,
+        # so the day splits into at most two runs of minutes with fixed sun times
+        for day_offset in (-1, 0, 1):
+            first = max(0, math.ceil((day_offset * SECONDS_PER_DAY - offset_seconds) / 60))
+            last = min(MINUTES_PER_DAY, math.ceil(((day_offset + 1) * SECONDS_PER_DAY - offset_seconds) / 60))
+            if first >= last:
+                continue
+            local_date = day_start.date() + datetime.timedelta(days=day_offset)
+            sun_times = self._sun_times_for(local_date)[slot]
+            if sun_times is None:
+                continue
+
+            dawn = sun_times["dawn"].timestamp()
+            noon = sun_times["noon"].timestamp()
+            dusk = sun_times["dusk"].timestamp()
+            # For locations where dusk falls after midnight UTC, astral hands back the
+            # previous night's dusk, which is earlier than dawn
+            if dusk < dawn:
+                dusk += SECONDS_PER_DAY
+            morning = noon - dawn
+            evening = dusk - noon
+
+            if np is not None:
+                current = day_start_ts + np.arange(first, last) * 60.0
+                values[first:last] = np.select(
+                    [(current < dawn) | (current > dusk),
+                     (dawn < current) & (current < noon),
+                     (noon < current) & (current < dusk)],
+                    [MIN_BRIGHTNESS,
+                     np.maximum(1 - ((noon - current) / morning), MIN_BRIGHTNESS),
+                     np.maximum((dusk - current) / evening, MIN_BRIGHTNESS)],
+                    1.0,
+                )
+                continue
+
+            values[first:last] = [
+                MIN_BRIGHTNESS if current < dawn or current > dusk else
+                max(1 - ((noon - current) / morning), MIN_BRIGHTNESS) if dawn < current < noon else
+                max((dusk - current) / evening, MIN_BRIGHTNESS) if noon < current < dusk else
+                1.0
+                for current in [day_start_ts + minute * 60 for minute in range(first, last)]
+            ]
+        return values
+
+    def curve(self, slot, utc_date=None):
+        """A slot's brightness factor for every minute of a UTC day"""
+        if utc_date is None:
+            utc_date = datetime.datetime.now(datetime.timezone.utc).date()
+        start = slot * MINUTES_PER_DAY
+        return self._curve_for(utc_date)[start:start + MINUTES_PER_DAY]
+
+    def sun_times(self, slot, current_time=None):
+        """Astral sun times for a slot on its local date at `current_time` (None in polar day/night)"""
+        if current_time is None:
+            current_time = datetime.datetime.now(datetime.timezone.utc)
+        _latitude, longitude = self._positions[slot]
+        return self._sun_times_for(local_date_for(longitude, current_time))[slot]
+
+    def refresh(self, current_time=None):
+        """Copy every slot's factor for the current minute out of the daily curves"""
+        if current_time is None:
+            current_time = datetime.datetime.now(datetime.timezone.utc)
+        curve = self._curve_for(current_time.date())
+        minute = current_time.hour * 60 + current_time.minute
+        for slot in range(len(self._positions)):
+            self.factors[slot] = curve[slot * MINUTES_PER_DAY + minute]
+        self._refreshed_minute = int(current_time.timestamp() // 60)
+        self.version += 1
+
+        if minute >= MINUTES_PER_DAY - PREBUILD_MINUTES:
+            self._prebuild(current_time.date() + datetime.timedelta(days=1))
+
+    def refresh_if_due(self, now=None):
+        """Refresh the factors if the minute changed since the last refresh (`now` in epoch seconds)"""
+        if now is None:
+            now = time.time()
+        if self._refreshed_minute != int(now // 60):
+            self.refresh(datetime.datetime.fromtimestamp(now, datetime.timezone.utc))
+
+    def factor(self, slot):
+        self.refresh_if_due()
+        return self.factors[slot]
+
+
+_brightness_service = None
+
+
+def get_brightness_service():
+    """The BrightnessService shared by every AirportLED in this process"""
+    global _brightness_service
+    if _brightness_service is None:
+        _brightness_service = BrightnessService()
+    return _brightness_service
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Diagnostic script — prints the current brightness factor for every airport.
+Diagnostic script — prints the current brightness factor for every airport,
+plus its brightness curve for the whole UTC day (one character per hour).
 Run with: sudo /root/env/bin/python3 /METARmaps/led/check_brightness.py
 
 Brightness is 0.01 (minimum, nighttime) to 1.0 (full, midday).
@@ -12,32 +13,42 @@ import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from metar_data import get_metar_data
+from shared_metar import get_shared_metar_data
 from airports import AIRPORT_CODES
-from sun_calculator import SunCalculator
+from brightness_service import BrightnessService
 
-print("Fetching METAR data...")
-metar_infos = get_metar_data()
+# Darkest to brightest, used to draw each hour of the day's curve
+CURVE_LEVELS = " .:-=+*#"
+
+print("Loading METAR data...")
+metar_infos = get_shared_metar_data()
 
 now = datetime.datetime.now(datetime.timezone.utc)
+service = BrightnessService()
+slots = {}
+for code in AIRPORT_CODES:
+    info = metar_infos.get(code)
+    if info is not None and info.latitude is not None:
+        slots[code] = service.register(info.latitude, info.longitude)
+service.refresh(now)
+
 print(f"Current UTC time: {now.strftime('%H:%M:%S')}\n")
-print(f"{'Airport':<8} {'Brightness':>10}  {'Dawn (UTC)':>12}  {'Dusk (UTC)':>12}  {'Status'}")
-print("-" * 65)
+print(f"{'Airport':<8} {'Brightness':>10}  {'Dawn (UTC)':>12}  {'Dusk (UTC)':>12}  {'Status':<22}  {'00-23h UTC'}")
+print("-" * 100)
 
 for code in AIRPORT_CODES:
-    info = metar_infos.get(code)
-    if info is None or info.latitude is None:
+    slot = slots.get(code)
+    if slot is None:
         print(f"{code:<8} {'no data':>10}")
         continue
 
-    calc = SunCalculator(info.latitude, info.longitude)
-    factor = calc.calculate_brightness_factor()
+    factor = service.factors[slot]
 
-    try:
-        sun_times = calc.get_current_sun_times()
+    sun_times = service.sun_times(slot, now)
+    if sun_times is not None:
         dawn = sun_times["dawn"].strftime("%H:%M:%S")
         dusk = sun_times["dusk"].strftime("%H:%M:%S")
-    except Exception:
+    else:
         dawn = dusk = "unknown"
 
     if factor <= 0.01:
@@ -47,4 +58,10 @@ for code in AIRPORT_CODES:
     else:
         status = "full brightness"
 
-    print(f"{code:<8} {factor:>10.2f}  {dawn:>12}  {dusk:>12}  {status}")
+    curve = service.curve(slot, now.date())
+    hourly = "".join(
+        CURVE_LEVELS[min(int(curve[hour * 60] * len(CURVE_LEVELS)), len(CURVE_LEVELS) - 1)]
+        for hour in range(24)
+    )
+
+    print(f"{code:<8} {factor:>10.2f}  {dawn:>12}  {dusk:>12}  {status:<22}  |{hourly}|")
@@ -0,0 +1,78 @@
+from constants import BLACK, COLOR_GAMMA, FLIGHT_CATEGORY_TO_COLOR, WHITE
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LUT_LEVELS = 256
+MAX_LEVEL = LUT_LEVELS - 1
+
+# LUT rows: BLACK for airports without data, every flight category, then WHITE for unknown categories
+LUT_COLORS = [BLACK] + list(FLIGHT_CATEGORY_TO_COLOR.values()) + [WHITE]
+NO_DATA_INDEX = 0
+UNKNOWN_INDEX = len(LUT_COLORS) - 1
+CATEGORY_INDEX = {category: index + 1 for index, category in enumerate(FLIGHT_CATEGORY_TO_COLOR)}
+
+
+def color_index_for(metar_info):
+    """LUT row for an airport's current observation"""
+    if metar_info is None or metar_info.flightCategory is None:
+        return NO_DATA_INDEX
+    return CATEGORY_INDEX.get(metar_info.flightCategory, UNKNOWN_INDEX)
+
+
+def brightness_level(brightness_factor):
+    """Quantize a 0.0-1.0 brightness factor to a LUT level"""
+    return min(MAX_LEVEL, max(0, int(brightness_factor * MAX_LEVEL + 0.5)))
+
+
+def fade_level(progress, direction):
+    """LUT level for a fade `progress` (0-1) toward black (direction 1) or back to color (-1)"""
+    if direction == 1:
+        return int(MAX_LEVEL * (1 - progress))
+    return int(MAX_LEVEL * progress)
+
+
+def combine_levels(level, other_level):
+    """Scale one level by another, e.g. time-of-day brightness by fade position"""
+    return level * other_level // MAX_LEVEL
+
+
+class ColorLUT:
+    """Every LUT color precomputed at all LUT_LEVELS intensities, with optional gamma correction.
+
+    `table` is a flat bytes object indexed by ((color_index * LUT_LEVELS) + level) * 3;
+    `array` is the same data as a (colors, levels, 3) NumPy view when NumPy is
+    available, and `tuples` holds ready-made color tuples for per-pixel callers.
+    """
+
+    def __init__(self, colors=LUT_COLORS, gamma=COLOR_GAMMA):
+        self.colors = colors
+        self.gamma = gamma
+
+        table = bytearray(len(colors) * LUT_LEVELS * 3)
+        for color_index, color in enumerate(colors):
+            for level in range(LUT_LEVELS):
+                offset = (color_index * LUT_LEVELS + level) * 3
+                table[offset:offset + 3] = bytes(self._scale(channel, level) for channel in color)
+        self.table = bytes(table)
+
+        self.tuples = [
+            [tuple(self.table[offset:offset + 3]) for offset in range(color_index * LUT_LEVELS * 3, (color_index + 1) * LUT_LEVELS * 3, 3)]
+            for color_index in range(len(colors))
+        ]
+        self.array = None
+        if np is not None:
+            self.array = np.frombuffer(self.table, dtype=np.uint8).reshape(len(colors), LUT_LEVELS, 3)
+
+    def _scale(self, channel, level):
+        if self.gamma is None:
+            return channel * level // MAX_LEVEL
+        return int(channel * (level / MAX_LEVEL) ** self.gamma + 0.5)
+
+    def color(self, color_index, level):
+        return self.tuples[color_index][level]
+
+
+COLOR_LUT = ColorLUT()
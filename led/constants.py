@@ -1,3 +1,5 @@
+import os
+
 # LED strip configuration:
 LED_COUNT = 249
 LED_BRIGHTNESS = 12  # Set to 0 for darkest and 255 for brightest
@@ -18,10 +20,83 @@ FLIGHT_CATEGORY_TO_COLOR = {
 }
 
 WIND_BLINK_THRESHOLD = 10
+# Also fade stations whose report has a thunderstorm or lightning (decoded from the raw METAR)
+LIGHTNING_BLINK = True
+
+# Gamma applied when building the color lookup tables (e.g. 2.2 for perceptually
+# even fades). None keeps brightness and fades linear.
+COLOR_GAMMA = None
+
+# The refresher polls right after stations' usual report times (see
+# refresh_scheduler.py) and otherwise at least this often, to catch SPECIs (seconds)
+METAR_REFRESH_INTERVAL = 60 * 10
+METAR_DENSE_INTERVAL = 60       # Poll interval while expected reports are missing
+METAR_DENSE_WINDOW = 60 * 10    # How long after a due time to keep polling densely
+METAR_PUBLISH_LAG = 60 * 3      # Typical delay between observation and the API having it
+METAR_DEFAULT_ISSUE_MINUTE = 53 # Assumed report minute for stations with no history yet
+
+# Stations per API request (keeps URLs and responses within API limits),
+# and how many of those requests run at once
+METAR_CHUNK_SIZE = 300
+METAR_FETCH_WORKERS = 4
+
+# Path or http(s) URL of a mirrored metars.cache.csv.gz bulk file. When set,
+# weather comes from it instead of the aviationweather.gov API, and every
+# refresh loads the whole file (polls of an unchanged file skip the download).
+METAR_CSV_SOURCE = None
+# Seconds loading the worldwide bulk file may take on a Pi Zero; slower loads
+# are logged, and parse_benchmark.py checks the synthetic file against it
+METAR_CSV_TIME_BUDGET = 5
+
+# After a failed fetch, retry after METAR_RETRY_DELAY, doubling per failure up to
+# METAR_RETRY_MAX_DELAY. After METAR_BREAKER_THRESHOLD failures in a row, stop
+# calling the API for METAR_BREAKER_COOLDOWN seconds and keep the cached data.
+METAR_RETRY_DELAY = 30
+METAR_RETRY_MAX_DELAY = 60 * 5
+METAR_BREAKER_THRESHOLD = 5
+METAR_BREAKER_COOLDOWN = 60 * 15
+
+# Stations report hourly, so an observation older than this means reports are
+# missing (or we can't reach the API); those stations are dimmed to STALE_LEVEL
+STALE_DATA_AGE = 60 * 60 * 2
+STALE_LEVEL = 64  # LUT level, out of 255
+
+# Last weather data and frame, repainted straight away after a crash restart.
+# /run is cleared on reboot, so a snapshot never outlives the boot it was taken in.
+WARM_SNAPSHOT_PATH = '/run/metarmap_snapshot'
+WARM_SNAPSHOT_MAX_AGE = 60 * 60  # Ignore snapshots older than this (seconds)
+
+# Stations fetched along with the map's airports because other services on the
+# box read them from the shared weather store (shared_weather.py), e.g. the OLED's
+SHARED_STATIONS = ["KOGD"]
+
+# Several maps on one network can share a single fetcher (METARMAP_MODE=publisher),
+# which multicasts each snapshot to the others (METARMAP_MODE=subscriber) so they
+# never call the API themselves. See weather_multicast.py.
+MULTICAST_GROUP = '239.255.77.77'
+MULTICAST_PORT = 5077
+MULTICAST_TTL = 1                # Don't route past the local network
+MULTICAST_FULL_INTERVAL = 60     # Resend the whole snapshot this often, for late or lossy subscribers (seconds)
+MULTICAST_MAX_DATAGRAM = 1200    # Bytes per datagram, within a typical Ethernet MTU
+MULTICAST_MAX_MESSAGE = 64 * 1024  # Most bytes a subscriber will decompress one datagram to; larger ones are dropped
 
 # Animation timing
 ANIMATION_FRAME_DELAY = 0.03  # 33 FPS for smooth fades
 
+# Gust fades: seconds for each direction (color -> black -> color is twice this)
+FADE_DURATION = 2.0
+# Spread gusting airports' fades over this many seconds of phase, offset per
+# station. 0 keeps every gusting airport fading in sync.
+FADE_PHASE_SPREAD = 0.0
+
+# Compute each frame for the whole strip at once (NumPy when available).
+# Set to False to fall back to updating one AirportLED at a time.
+USE_FRAME_ENGINE = True
+
+# Airports whose coordinates match to this many decimal places (~11 km at 1)
+# share one set of sun times and one brightness factor
+BRIGHTNESS_COORD_PRECISION = 1
+
 def _detect_loop_delay():
     """Use a slower loop on Pi Zero W (single-core) to avoid pegging the CPU"""
     try:
@@ -36,12 +111,26 @@ def _detect_loop_delay():
 
 MAIN_LOOP_DELAY = _detect_loop_delay()
 
-def get_strip():
-    """Lazy-load the NeoPixel strip to avoid import issues during testing"""
+# Loop delay while nothing is fading — frames only change with brightness or new weather
+IDLE_LOOP_DELAY = 1.0
+
+def get_strip(backend=None, count=LED_COUNT):
+    """Lazy-load the strip backend to avoid import issues during testing.
+
+    `backend` (or the METARMAP_STRIP environment variable) picks the output:
+    "neopixel" (default) drives the real strip, "virtual" keeps frames in memory.
+    """
+    backend = backend or os.environ.get("METARMAP_STRIP", "neopixel")
+    if backend == "virtual":
+        from virtual_strip import VirtualStrip
+        return VirtualStrip(count, max_frames=1)
+    if backend != "neopixel":
+        raise ValueError(f"Unknown strip backend: {backend}")
+
     import neopixel
     import board
     
     LED_PIN = board.D18
     return neopixel.NeoPixel(
-        LED_PIN, LED_COUNT, brightness=LED_BRIGHTNESS, auto_write=False
+        LED_PIN, count, brightness=LED_BRIGHTNESS, auto_write=False
     )
@@ -0,0 +1,81 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class FrameBuffer:
+    """Preallocated strip-order byte buffer handed to the NeoPixel driver in one copy.
+
+    Frames come in as flat color tuple order sequences (see FrameEngine) and are
+    scattered into the strip's own byte order (GRB for our NeoPixels) with slice
+    assignments, so no per-pixel tuples are built and the driver's per-pixel
+    color parsing is skipped entirely.
+    """
+
+    def __init__(self, strip, count):
+        self.strip = strip
+        self.count = count
+
+        # PixelBuf-based strips (adafruit neopixel) describe their byte layout;
+        # anything else is treated as plain RGB order
+        self.bpp = 3
+        self.byteorder = (0, 1, 2)
+        if hasattr(strip, "parse_byteorder") and hasattr(strip, "byteorder"):
+            bpp, byteorder, _has_white, _dotstar_mode = strip.parse_byteorder(strip.byteorder)
+            self.bpp = bpp
+            self.byteorder = byteorder
+
+        self.buffer = bytearray(count * self.bpp)
+        self._rgb_positions = list(self.byteorder[:3])
+        self._view = None
+        if np is not None:
+            self._view = np.frombuffer(self.buffer, dtype=np.uint8).reshape(count, self.bpp)
+        self._target = self._driver_buffer()
+
+    def _driver_buffer(self):
+        """The driver's transmit buffer, if frames can be copied into it verbatim"""
+        buffer = getattr(self.strip, "_post_brightness_buffer", None)
+        # RGBW strips substitute the white channel per pixel, so only RGB strips are copied raw
+        if buffer is None or self.bpp != 3:
+            return None
+        # With brightness < 1.0 the driver scales every write, so a raw copy would be wrong
+        if getattr(self.strip, "_pre_brightness_buffer", None) is not None:
+            return None
+        if getattr(self.strip, "_offset", 0) != 0 or len(buffer) != len(self.buffer):
+            return None
+        return buffer
+
+    @property
+    def bulk(self):
+        return self._target is not None
+
+    def load(self, frame):
+        """Scatter a flat color tuple order frame into the strip-order buffer"""
+        if self._view is not None and isinstance(frame, np.ndarray):
+            self._view[:, self._rgb_positions] = frame.reshape(self.count, 3)
+        else:
+            for channel, position in enumerate(self._rgb_positions):
+                self.buffer[position::self.bpp] = frame[channel::3]
+
+    def push(self, frame):
+        """Hand the loaded buffer to the driver (falls back to per-pixel writes)"""
+        if self._target is not None:
+            self._target[:] = self.buffer
+        else:
+            write_frame(self.strip, frame)
+
+
+def write_frame(strip, frame):
+    """Copy a flat frame into the strip, one pixel tuple per LED"""
+    for index in range(len(frame) // 3):
+        offset = index * 3
+        strip[index] = (int(frame[offset]), int(frame[offset + 1]), int(frame[offset + 2]))
+
+
+def paint_frame(strip, frame):
+    """Show a flat color tuple order frame straight away, e.g. one saved before a restart"""
+    frame_buffer = FrameBuffer(strip, len(frame) // 3)
+    frame_buffer.load(frame)
+    frame_buffer.push(frame)
+    strip.show()
@@ -0,0 +1,42 @@
+import time
+import zlib
+
+from constants import FADE_DURATION, FADE_PHASE_SPREAD
+
+
+class FrameClock:
+    """One time sample per frame, shared by every renderer.
+
+    Sampling once keeps all fades on the same timeline, saves a time()
+    call per pixel and lets tests drive frames with explicit times.
+    """
+
+    def __init__(self, time_source=time.time):
+        self.time_source = time_source
+        self.now = time_source()
+        self.frame = 0
+
+    def tick(self, now=None):
+        """Advance to the next frame, sampling the time source unless `now` is given"""
+        self.now = self.time_source() if now is None else now
+        self.frame += 1
+        return self.now
+
+
+def phase_offset_for(airport_code, spread=FADE_PHASE_SPREAD):
+    """Stable per-station fade phase offset in seconds, spread over [0, spread)"""
+    if not spread:
+        return 0.0
+    return zlib.crc32(airport_code.encode()) / 2 ** 32 * spread
+
+
+def fade_phase(now, phase_offset=0.0, duration=FADE_DURATION):
+    """Where a fade is at time `now`: (progress 0-1, direction).
+
+    Direction 1 is fading from the base color to black, -1 is fading
+    back from black. A full cycle takes twice `duration`.
+    """
+    position = (now + phase_offset) % (2 * duration)
+    if position < duration:
+        return position / duration, 1
+    return (position - duration) / duration, -1
@@ -0,0 +1,121 @@
+import time
+from array import array
+
+from airports import wants_fade
+from brightness_service import get_brightness_service
+from color_lut import COLOR_LUT, LUT_LEVELS, MAX_LEVEL, color_index_for, fade_level
+from constants import FADE_DURATION
+from frame_clock import fade_phase
+
+try:
+    import numpy as np
+except ImportError:  # Plain array fallback on installs without NumPy
+    np = None
+
+
+class FrameEngine:
+    """Computes a whole strip frame at once from per-LED state held in flat arrays.
+
+    Each LED is reduced to a color LUT row and an integer level (time-of-day
+    brightness scaled by fade position), so a pixel is one table lookup and
+    frames come out exactly as AirportLED.get_color() would produce them.
+    Fade position is a pure function of the frame time and each station's
+    phase offset. Frames are flat sequences of 3 * LED count channel values
+    in color tuple order.
+    """
+
+    def __init__(self, airport_leds, use_numpy=True, lut=COLOR_LUT):
+        self.airport_leds = airport_leds
+        self.count = len(airport_leds)
+        self.use_numpy = use_numpy and np is not None
+        self.lut = lut
+        self.fade_duration = airport_leds[0].fade_duration if airport_leds else FADE_DURATION
+        self.brightness_service = airport_leds[0].brightness_service if airport_leds else get_brightness_service()
+        self._brightness_version = None
+
+        phase_offsets = [airport_led.phase_offset for airport_led in airport_leds]
+        if self.use_numpy:
+            self.color_index = np.zeros(self.count, dtype=np.intp)
+            self.brightness_levels = np.full(self.count, MAX_LEVEL, dtype=np.int32)
+            self.gusting = np.zeros(self.count, dtype=bool)
+            self.phase_offsets = np.array(phase_offsets, dtype=np.float64)
+        else:
+            self.color_index = array('B', [0] * self.count)
+            self.brightness_levels = array('H', [MAX_LEVEL] * self.count)
+            self.gusting = array('b', [0] * self.count)
+            self.phase_offsets = array('d', phase_offsets)
+
+        self.update(range(self.count))
+
+    def update(self, indices):
+        """Reload color, brightness and gust state for the given LED indices"""
+        for index in indices:
+            airport_led = self.airport_leds[index]
+            metar_info = airport_led.metar_info
+            self.color_index[index] = color_index_for(metar_info)
+            self.gusting[index] = (
+                metar_info is not None and
+                metar_info.flightCategory is not None and
+                wants_fade(metar_info)
+            )
+            self.brightness_levels[index] = airport_led.get_brightness_level()
+
+    @property
+    def animating(self):
+        """True while any LED is fading, i.e. consecutive frames can differ"""
+        if self.use_numpy:
+            return bool(self.gusting.any())
+        return any(self.gusting)
+
+    def refresh_brightness(self):
+        """Re-read every LED's level from the shared brightness service"""
+        factors = self.brightness_service.factors
+        for index, airport_led in enumerate(self.airport_leds):
+            self.brightness_levels[index] = airport_led.level_from_factors(factors)
+        self._brightness_version = self.brightness_service.version
+
+    def render(self, now=None):
+        """Compute the frame for frame-clock time `now`"""
+        if now is None:
+            now = time.time()
+        # Brightness only changes when the service recomputes it (once a minute,
+        # from FrameLoop.tick)
+        if self.brightness_service.version != self._brightness_version:
+            self.refresh_brightness()
+
+        if self.use_numpy:
+            return self._render_numpy(now)
+        return self._render_array(now)
+
+    def _render_numpy(self, now):
+        levels = self.brightness_levels
+        fading = np.flatnonzero(self.gusting)
+        if fading.size:
+            # Same arithmetic as frame_clock.fade_phase, for every fading LED at once
+            duration = self.fade_duration
+            position = (now + self.phase_offsets[fading]) % (2 * duration)
+            to_black = position < duration
+            progress = np.where(to_black, position / duration, (position - duration) / duration)
+
+            fade_levels = np.where(
+                to_black,
+                MAX_LEVEL * (1 - progress),
+                MAX_LEVEL * progress,
+            ).astype(np.int32)
+            levels = levels.copy()
+            levels[fading] = levels[fading] * fade_levels // MAX_LEVEL
+
+        return self.lut.array[self.color_index, levels].ravel()
+
+    def _render_array(self, now):
+        frame = array('B', bytes(self.count * 3))
+        table = self.lut.table
+        for index in range(self.count):
+            level = self.brightness_levels[index]
+            if self.gusting[index]:
+                progress, direction = fade_phase(now, self.phase_offsets[index], self.fade_duration)
+                level = level * fade_level(progress, direction) // MAX_LEVEL
+
+            offset = (self.color_index[index] * LUT_LEVELS + level) * 3
+            frame[index * 3:index * 3 + 3] = array('B', table[offset:offset + 3])
+        return frame
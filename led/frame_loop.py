@@ -0,0 +1,103 @@
+import time
+
+from airports import update_airport_leds
+from brightness_service import get_brightness_service
+from constants import IDLE_LOOP_DELAY, MAIN_LOOP_DELAY, USE_FRAME_ENGINE
+from frame_buffer import FrameBuffer
+from frame_clock import FrameClock
+from frame_engine import FrameEngine
+
+
+class FrameLoop:
+    """Renders weather frames to the strip, only pushing frames that changed"""
+
+    # Observations age by the minute, so re-checking for stale data more often is wasted work
+    stale_check_interval = 60
+
+    def __init__(self, strip, airport_leds, use_engine=USE_FRAME_ENGINE, clock=None):
+        self.strip = strip
+        self.airport_leds = airport_leds
+        self.clock = clock if clock is not None else FrameClock()
+        self.engine = FrameEngine(airport_leds) if use_engine else None
+        self.frame_buffer = FrameBuffer(strip, len(airport_leds)) if use_engine else None
+        self.brightness_service = airport_leds[0].brightness_service if airport_leds else get_brightness_service()
+
+        self._last_frame = None
+        self._shown_frame = None
+        self._stale_checked = None
+        self.frame_count = 0
+        self.show_count = 0
+
+    def update(self, metar_infos):
+        """Apply new weather data. Returns the LED indices that changed."""
+        changed = update_airport_leds(self.airport_leds, metar_infos)
+        changed = sorted(set(changed).union(self._check_staleness(time.time())))
+        if self.engine is not None:
+            self.engine.update(changed)
+        return changed
+
+    def update_staleness(self, now=None):
+        """Dim or restore airports whose data crossed the stale age. Returns the LED indices that changed."""
+        changed = self._check_staleness(time.time() if now is None else now)
+        if changed and self.engine is not None:
+            self.engine.update(changed)
+        return changed
+
+    def _check_staleness(self, now):
+        self._stale_checked = now
+        return [
+            index for index, airport_led in enumerate(self.airport_leds)
+            if airport_led.update_staleness(now)
+        ]
+
+    @property
+    def animating(self):
+        if self.engine is not None:
+            return self.engine.animating
+        return any(airport_led.should_fade for airport_led in self.airport_leds)
+
+    @property
+    def last_frame(self):
+        """Flat color tuple order bytes of the last frame shown, or None before the first one.
+
+        Each shown frame is a new object that is never changed afterwards, so
+        other threads (e.g. the warm snapshot saver) can read this too.
+        """
+        if self._shown_frame is None:
+            return None
+        return bytes(self._shown_frame)
+
+    def tick(self, now=None):
+        """Render one frame and show it if it differs from the last one.
+
+        The frame clock is sampled once (or set to `now`), refreshes brightness
+        and is shared by every LED in the frame. Returns how long to sleep:
+        MAIN_LOOP_DELAY while something is fading, IDLE_LOOP_DELAY otherwise.
+        """
+        self.frame_count += 1
+        now = self.clock.tick(now)
+        # Time-of-day brightness changes by the minute: check once per frame, not per LED
+        self.brightness_service.refresh_if_due(now)
+        if self._stale_checked is None or now - self._stale_checked >= self.stale_check_interval:
+            self.update_staleness(now)
+        if self.engine is not None:
+            frame = self.engine.render(now)
+            self.frame_buffer.load(frame)
+            if self.frame_buffer.buffer != self._last_frame:
+                self.frame_buffer.push(frame)
+                self._show(bytes(self.frame_buffer.buffer), frame)
+        else:
+            colors = [airport_led.get_color(now) for airport_led in self.airport_leds]
+            frame_bytes = bytes(int(channel) for color in colors for channel in color)
+            if frame_bytes != self._last_frame:
+                for airport_led, color in zip(self.airport_leds, colors):
+                    self.strip[airport_led.pixel_index] = color
+                self._show(frame_bytes, frame_bytes)
+
+        return MAIN_LOOP_DELAY if self.animating else IDLE_LOOP_DELAY
+
+    def _show(self, frame_bytes, frame):
+        self.strip.show()
+        self.show_count += 1
+        self._last_frame = frame_bytes
+        self._shown_frame = frame
@@ -1,7 +1,7 @@
 import math
 import time
 from typing import List, Tuple, Dict
-from metar_data import get_metar_data
+from shared_metar import get_shared_metar_data
 from airports import AIRPORT_CODES
 from constants import BLACK, WHITE, GREEN
 
@@ -14,7 +14,7 @@ class GeographicMapper:
     def build_mapping(self):
         """Fetch coordinates for all airports and build the mapping"""
         print("Fetching airport coordinates...")
-        metar_data = get_metar_data()
+        metar_data = get_shared_metar_data()
         
         for led_index, airport_code in enumerate(AIRPORT_CODES):
             if airport_code in metar_data:
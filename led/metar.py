@@ -3,10 +3,15 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from airports import AirportLED, AIRPORT_CODES
-from constants import get_strip, MAIN_LOOP_DELAY
-from metar_data import get_metar_data
+from constants import get_strip
+from frame_buffer import paint_frame
+from frame_loop import FrameLoop
+from metar_refresher import MetarRefresher
 from shared_logger import setup_logger
+from shared_metar import publish_metar_infos
 from startup_animation import startup_sequence
+from warm_snapshot import load_snapshot, snapshot_saver
+from weather_multicast import MulticastPublisher, MulticastSubscriber
 import time
 
 logger = setup_logger('metarmap-led')
@@ -20,41 +25,92 @@ def _is_first_start():
     open(_BOOT_FLAG, 'w').close()
     return True
 
+def _weather_source(mode=None, publish=publish_metar_infos):
+    """Where weather comes from, by `mode` (or the METARMAP_MODE environment variable).
+
+    "standalone" (default) fetches from the API, "publisher" fetches and also
+    multicasts each snapshot to other maps, and "subscriber" takes snapshots
+    from a publisher instead of fetching. In every mode each snapshot is passed
+    to `publish` (by default, the shared store for the OLED). Returns (source,
+    publisher or None); the source has the MetarRefresher interface.
+    """
+    mode = mode or os.environ.get("METARMAP_MODE", "standalone")
+    if mode == "subscriber":
+        return MulticastSubscriber(publish=publish), None
+    if mode == "publisher":
+        publisher = MulticastPublisher()
+
+        def publish_and_multicast(version, metar_infos):
+            publish(version, metar_infos)
+            publisher.publish(version, metar_infos)
+        return MetarRefresher(publish=publish_and_multicast), publisher
+    if mode != "standalone":
+        raise ValueError(f"Unknown weather mode: {mode}")
+    return MetarRefresher(publish=publish), None
+
 def run():
     logger.info("METARMap starting up...")
-    now = time.time()
+    refresher = None
+    publisher = None
 
     try:
         strip = get_strip()
 
+        saved_infos = None
         if _is_first_start():
             logger.info("First start after boot — running startup animation.")
             startup_sequence(strip, logger)
         else:
             logger.info("Restarting after failure — skipping startup animation.")
+            # Put the last known map back up before anything slow happens
+            saved_frame, saved_infos = load_snapshot(len(AIRPORT_CODES))
+            if saved_frame is not None:
+                paint_frame(strip, saved_frame)
+                logger.info("Restored last frame from warm snapshot")
         
-        metar_infos = get_metar_data()
-        logger.info(f"Loaded weather data for {len(metar_infos)} airports")
-        airport_leds = [AirportLED(strip, index, airport_code, metar_infos.get(airport_code)) for index, airport_code in enumerate(AIRPORT_CODES)]
+        airport_leds = [AirportLED(strip, index, airport_code, None) for index, airport_code in enumerate(AIRPORT_CODES)]
+        frame_loop = FrameLoop(strip, airport_leds)
         logger.info(f"Initialized {len(airport_leds)} LEDs")
 
+        # Weather data is fetched (or received from a publisher) on a background
+        # thread; LEDs stay dark (or show the restored snapshot) until the first
+        # snapshot lands, and animations keep running while it refreshes. Each
+        # snapshot is also published to the shared store, so the OLED and
+        # diagnostics don't fetch for themselves, and saved with the last shown
+        # frame for a warm restart, all on that background thread.
+        save_warm_snapshot = snapshot_saver(frame_loop)
+
+        def publish(version, metar_infos):
+            publish_metar_infos(version, metar_infos)
+            save_warm_snapshot(version, metar_infos)
+
+        refresher, publisher = _weather_source(publish=publish)
+        if saved_infos:
+            refresher.seed(saved_infos)
+        refresher.start()
+        if publisher is not None:
+            publisher.start()
+        snapshot_version = 0
+
         while True:
-            if time.time() - now >= 60 * 5: # 5 minute
-                logger.info("Updating weather data...")
-                metar_infos = get_metar_data()
-                logger.info(f"Updated weather data for {len(metar_infos)} airports")
-                airport_leds = [AirportLED(strip, index, airport_code, metar_infos.get(airport_code)) for index, airport_code in enumerate(AIRPORT_CODES)]
-                now = time.time()
-
-            # Update all LEDs (static and fading)
-            for airport_led in airport_leds:
-                airport_led.set_pixel_color()
-            strip.show()
-            
-            time.sleep(MAIN_LOOP_DELAY)
+            version, metar_infos = refresher.snapshot
+            if version != snapshot_version:
+                changed = frame_loop.update(metar_infos)
+                logger.info(f"Updated weather data for {len(metar_infos)} airports ({len(changed)} LEDs changed)")
+                snapshot_version = version
+
+            # Update all LEDs (static and fading); unchanged frames are not re-sent
+            # and the loop slows to an idle tick while nothing is fading
+            delay = frame_loop.tick()
+
+            time.sleep(delay)
             
     except KeyboardInterrupt:
         logger.info("Shutting down...")
+        if refresher is not None:
+            refresher.stop()
+        if publisher is not None:
+            publisher.stop()
         # Turn off all LEDs
         strip.fill((0, 0, 0))
         strip.show()
@@ -0,0 +1,122 @@
+import logging
+import time
+
+from airports import observation_changed
+from constants import (
+    METAR_BREAKER_COOLDOWN,
+    METAR_BREAKER_THRESHOLD,
+    METAR_RETRY_DELAY,
+    METAR_RETRY_MAX_DELAY,
+)
+from metar_data import MetarInfos, get_metar_data
+
+logger = logging.getLogger(__name__)
+
+
+def observed_before(metar_info, other):
+    """True when `metar_info` is an older observation than `other` (False if either time is unknown)"""
+    if other is None or metar_info.observation_time is None or other.observation_time is None:
+        return False
+    return metar_info.observation_time < other.observation_time
+
+
+class MetarCache:
+    """Last good observation for every station, kept fresh from the fetcher.
+
+    Fetch errors never propagate: the cached data keeps being served and the
+    next attempt backs off exponentially. After `breaker_threshold` failures in
+    a row the circuit breaker opens and the API is left alone for
+    `breaker_cooldown` seconds. Stations missing from a fetch keep their last
+    observation; age() says how old each one is.
+    """
+
+    def __init__(self, fetch=get_metar_data, retry_delay=METAR_RETRY_DELAY, max_retry_delay=METAR_RETRY_MAX_DELAY,
+                 breaker_threshold=METAR_BREAKER_THRESHOLD, breaker_cooldown=METAR_BREAKER_COOLDOWN,
+                 clock=time.monotonic):
+        self.fetch = fetch
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.clock = clock
+
+        self.metar_infos = None
+        self._last_fetched = None
+        self.failures = 0
+        self.open_until = None
+
+    @property
+    def breaker_open(self):
+        return self.open_until is not None and self.clock() < self.open_until
+
+    def seed(self, metar_infos):
+        """Start from data obtained elsewhere (e.g. a warm-restart snapshot)"""
+        self.metar_infos = metar_infos
+
+    def refresh(self, stations=None):
+        """Try to fetch new data. Returns the cached MetarInfos (None until the first success).
+
+        With `stations`, only those are requested and merged into the cache. A new
+        MetarInfos object is returned only when the fetch brought a changed
+        observation; otherwise it is the same object as before. A fetched station
+        older than the cached observation is ignored.
+        """
+        if self.breaker_open:
+            logger.debug(f"Circuit breaker open, serving cached data for {self.open_until - self.clock():.0f}s more")
+            return self.metar_infos
+
+        try:
+            fetched = self.fetch() if stations is None else self.fetch(stations)
+        except Exception as e:
+            self._record_failure(e)
+            return self.metar_infos
+
+        if self.failures:
+            logger.info(f"METAR fetch recovered after {self.failures} failure(s)")
+        self.failures = 0
+        self.open_until = None
+        if fetched is self._last_fetched:
+            return self.metar_infos
+        self._last_fetched = fetched
+
+        cached = self.metar_infos if self.metar_infos is not None else {}
+        # A full fetch can hand back older data than the cache holds (the fetcher
+        # keeps a failed chunk's previous parse), so never let a station go backwards
+        accepted = {
+            code: metar_info for code, metar_info in fetched.items()
+            if not observed_before(metar_info, cached.get(code))
+        }
+        if cached and not any(observation_changed(cached.get(code), metar_info) for code, metar_info in accepted.items()):
+            return self.metar_infos
+
+        metar_infos = MetarInfos()
+        metar_infos.update(cached)
+        metar_infos.update(accepted)
+        self.metar_infos = metar_infos
+        return metar_infos
+
+    def _record_failure(self, error):
+        self.failures += 1
+        if self.failures >= self.breaker_threshold:
+            self.open_until = self.clock() + self.breaker_cooldown
+            logger.warning(f"METAR fetch failed {self.failures} times in a row ({error}); "
+                           f"pausing requests for {self.breaker_cooldown}s")
+        else:
+            logger.warning(f"METAR fetch failed ({error}); retrying in {self.next_delay():.0f}s")
+
+    def next_delay(self, interval=None):
+        """Seconds until the next fetch should be attempted; `interval` when all is well"""
+        if self.breaker_open:
+            return self.open_until - self.clock()
+        if self.failures == 0:
+            return interval
+        return min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures - 1))
+
+    def age(self, airport_code, now=None):
+        """Seconds since the station's cached observation, or None if there is none"""
+        if self.metar_infos is None:
+            return None
+        metar_info = self.metar_infos.get(airport_code)
+        if metar_info is None:
+            return None
+        return metar_info.age(now)
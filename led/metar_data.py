@@ -1,14 +1,103 @@
 from collections import defaultdict
 import xml.etree.ElementTree as ET
+import csv
 import datetime
+import gzip
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import requests.adapters
 import logging
 
 from airports import AIRPORT_CODES
+from constants import (
+    METAR_CHUNK_SIZE,
+    METAR_CSV_SOURCE,
+    METAR_CSV_TIME_BUDGET,
+    METAR_FETCH_WORKERS,
+    SHARED_STATIONS,
+)
+from metar_decoder import decode_metar
 
 logger = logging.getLogger(__name__)
 
+# Everything one fetch cycle asks for: the map's airports plus the stations other
+# services read from the shared weather store
+FETCH_STATIONS = AIRPORT_CODES + [code for code in SHARED_STATIONS if code not in AIRPORT_CODES]
+
+
+# Converters for the MetarInfo fields the LED loop doesn't need up front.
+# Each takes the value as stored (for JSON, as the API reported it; None when
+# absent) and returns the field's value, every time the field is read.
+def _json_temperature(value):
+    return int(round(value)) if value is not None else 0
+
+
+def _json_visibility(visib):
+    if not visib:
+        return 0
+    try:
+        return int(round(float(str(visib).replace("+", ""))))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _json_altimeter(altim):
+    # hPa to inHg, to the hundredths a METAR reports
+    return round(altim / 33.8639, 2) if altim else 0.0
+
+
+def _json_observation_time(obs_time):
+    if not obs_time:
+        return None
+    try:
+        # obsTime is a Unix timestamp
+        return datetime.datetime.fromtimestamp(obs_time, tz=datetime.timezone.utc)
+    except (ValueError, TypeError, OSError):
+        return None
+
+
+def _compact_clouds(clouds, base_key):
+    """Cloud layers as one flat (cover, base, cover, base, ...) tuple.
+
+    A few hundred bytes smaller per station than the list of dicts the API and
+    skyConditions use; covers are interned, so every "BKN" is the same string.
+    """
+    compact = []
+    for cloud in clouds or ():
+        cover = cloud.get("cover")
+        compact += (sys.intern(cover) if isinstance(cover, str) else cover, cloud.get(base_key, 0))
+    return tuple(compact)
+
+
+def _raw_text_effects(raw_text, wind_gust_speed):
+    """(gust speed, gusting, lightning) for a report, filling in what the raw text adds.
+
+    The gust from the structured data wins; the raw text supplies one when it is missing.
+    """
+    if not raw_text:
+        return wind_gust_speed, bool(wind_gust_speed), False
+    decoded = decode_metar(raw_text)
+    if not wind_gust_speed and decoded.wind_gust is not None:
+        wind_gust_speed = decoded.wind_gust
+    return wind_gust_speed, bool(wind_gust_speed), decoded.lightning
+
+
 class MetarInfo:
+    # Thousands of these can be alive at once on a 512 MB Pi, so no per-instance
+    # __dict__, and each value is stored once, as reported: the fields the map
+    # reads in another form (tempC, vis, skyConditions, ...) are properties that
+    # convert on every read. Nothing is cached, so any thread can read any field.
+    __slots__ = (
+        "airport_code", "flightCategory", "windSpeed", "windGustSpeed", "windGust", "lightning",
+        "latitude", "longitude", "raw_text", "temperature", "dewpoint", "visibility", "altimeter",
+        "elevation", "_wind_dir", "_obs", "_clouds", "_obs_time",
+    )
+
     def __init__(
         self,
         airport_code,
@@ -26,8 +115,17 @@ class MetarInfo:
         skyConditions,
         latitude,
         longitude,
-        obsTime
+        obsTime,
+        rawText="",
+        temperature=None,
+        dewpoint=None,
+        visibility=None,
+        altimeter=None,
+        elevation=None,
     ):
+        # temperature (C), dewpoint (C), visibility (statute miles, e.g. "10+"),
+        # altimeter (hPa) and elevation (m) are the values as reported; when
+        # they aren't given, tempC, dewpointC, vis and altimHg stand in for them
         self.airport_code = airport_code
         self.flightCategory = flightCategory
         self.windDir = windDir
@@ -35,235 +133,639 @@ class MetarInfo:
         self.windGustSpeed = windGustSpeed
         self.windGust = windGust
         self.lightning = lightning
-        self.tempC = tempC
-        self.dewpointC = dewpointC
-        self.vis = vis
-        self.altimHg = altimHg
         self.obs = obs
         self.skyConditions = skyConditions
         self.latitude = latitude
         self.longitude = longitude
         self.observation_time = obsTime
+        self.raw_text = rawText
+        self.temperature = tempC if temperature is None else temperature
+        self.dewpoint = dewpointC if dewpoint is None else dewpoint
+        self.visibility = vis if visibility is None else visibility
+        self.altimeter = altimHg * 33.8639 if altimeter is None and altimHg else altimeter  # inHg to hPa
+        self.elevation = elevation
+
+    @classmethod
+    def from_json_record(cls, airport_code, flightCategory, metar):
+        """Build from an API v4.0 JSON record, converting only what the LED loop reads.
+
+        Everything else is kept as the record has it and converted when read;
+        the record itself is not retained.
+        """
+        metar_info = cls.__new__(cls)
+        metar_info.airport_code = airport_code
+        metar_info.flightCategory = sys.intern(flightCategory)
+        metar_info.windSpeed = metar.get("wspd", 0) or 0
+        metar_info.raw_text = metar.get("rawOb") or ""
+        metar_info.windGustSpeed, metar_info.windGust, metar_info.lightning = _raw_text_effects(
+            metar_info.raw_text, metar.get("wgst", 0) or 0)
+        metar_info.latitude = metar.get("lat", 0)
+        metar_info.longitude = metar.get("lon", 0)
+        metar_info.temperature = metar.get("temp")
+        metar_info.dewpoint = metar.get("dewp")
+        metar_info.visibility = metar.get("visib")
+        metar_info.altimeter = metar.get("altim")
+        metar_info.elevation = metar.get("elev")
+        # Can be an integer (degrees) or a string ("VRB" for variable)
+        metar_info._wind_dir = metar.get("wdir")
+        metar_info._obs = metar.get("wxString")
+        metar_info._clouds = _compact_clouds(metar.get("clouds"), "base")
+        metar_info._obs_time = metar.get("obsTime")
+        return metar_info
+
+    @property
+    def windDir(self):
+        return str(self._wind_dir) if self._wind_dir is not None else ""
+
+    @windDir.setter
+    def windDir(self, windDir):
+        self._wind_dir = windDir if windDir != "" else None
+
+    @property
+    def tempC(self):
+        return _json_temperature(self.temperature)
+
+    @property
+    def dewpointC(self):
+        return _json_temperature(self.dewpoint)
+
+    @property
+    def vis(self):
+        return _json_visibility(self.visibility)
+
+    @property
+    def altimHg(self):
+        return _json_altimeter(self.altimeter)
+
+    @property
+    def obs(self):
+        return self._obs or ""
+
+    @obs.setter
+    def obs(self, obs):
+        self._obs = obs or None
+
+    @property
+    def skyConditions(self):
+        clouds = self._clouds
+        return [{"cover": clouds[index], "cloudBaseFt": clouds[index + 1]} for index in range(0, len(clouds), 2)]
+
+    @skyConditions.setter
+    def skyConditions(self, skyConditions):
+        self._clouds = _compact_clouds(skyConditions, "cloudBaseFt")
+
+    @property
+    def observation_time(self):
+        return _json_observation_time(self._obs_time)
+
+    @observation_time.setter
+    def observation_time(self, obsTime):
+        self._obs_time = obsTime.timestamp() if obsTime is not None else None
+
+    def age(self, now=None):
+        """Seconds since this observation was made, or None if its time is unknown"""
+        if self.observation_time is None:
+            return None
+        if now is None:
+            now = time.time()
+        return now - self.observation_time.timestamp()
+
+    def to_record(self):
+        """This observation as an API v4.0 style JSON record, readable by MetarInfos.from_json.
+
+        Values are as reported, so a record from the API comes back with the
+        same temperatures, visibility, altimeter, elevation and wind direction.
+        """
+        return {
+            "icaoId": self.airport_code,
+            "fltCat": self.flightCategory,
+            "wdir": self._wind_dir,
+            "wspd": self.windSpeed,
+            "wgst": self.windGustSpeed or None,
+            "temp": self.temperature,
+            "dewp": self.dewpoint,
+            "visib": self.visibility,
+            "altim": self.altimeter,
+            "elev": self.elevation,
+            "wxString": self._obs,
+            "lat": self.latitude,
+            "lon": self.longitude,
+            "obsTime": int(self.observation_time.timestamp()) if self.observation_time else None,
+            "rawOb": self.raw_text or None,
+            "clouds": [
+                {"cover": sky["cover"], "base": sky["cloudBaseFt"]} for sky in self.skyConditions
+            ],
+        }
 
     def __repr__(self):
         return f'MetarInfo<airportcode={self.airport_code}, flight_category={self.flightCategory}>'
 
 
+# Cloud covers that form a ceiling (OVX is an obscured sky, with vertical visibility as its base)
+CEILING_COVERS = {"BKN", "OVC", "OVX"}
+
+
+def flight_category_for(visibility, ceiling):
+    """FAA flight category for visibility (statute miles) and ceiling (feet AGL, None if unlimited)"""
+    if visibility < 1 or (ceiling is not None and ceiling < 500):
+        return "LIFR"  # Low IFR
+    if visibility < 3 or (ceiling is not None and ceiling < 1000):
+        return "IFR"
+    if visibility <= 5 or (ceiling is not None and ceiling <= 3000):
+        return "MVFR"  # Marginal VFR
+    return "VFR"
+
+
+def _statute_miles(visib):
+    """Visibility from the API ("10+", 2.5, "1 1/2", ...) in statute miles; 10 when unknown"""
+    if visib in (None, ""):
+        return 10
+    text = str(visib).replace("+", "").strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        whole, _space, fraction = text.rpartition(" ")
+        numerator, denominator = fraction.split("/")
+        return float(whole or 0) + int(numerator) / int(denominator)
+    except (ValueError, ZeroDivisionError):
+        return 10
+
+
 class MetarInfos(defaultdict):
     @classmethod
     def _calculate_flight_category(cls, metar):
         """Calculate flight category based on visibility and ceiling."""
-        vis = 10  # Default to 10+ miles
-        if metar.get("visib"):
-            vis_str = str(metar.get("visib")).replace("+", "")
-            try:
-                vis = float(vis_str)
-            except (ValueError, TypeError):
-                vis = 10
-        
-        # Find lowest ceiling
-        ceiling = None
-        if metar.get("clouds"):
-            for cloud in metar.get("clouds", []):
-                cover = cloud.get("cover", "").upper()
-                if cover in ["BKN", "OVC"]:  # Broken or Overcast
-                    base = cloud.get("base", 0)
-                    if ceiling is None or base < ceiling:
-                        ceiling = base
-        
-        # Determine flight category
-        if ceiling is not None and ceiling < 500:
-            return "LIFR"  # Low IFR
-        elif vis < 1 or (ceiling is not None and ceiling < 500):
-            return "LIFR"
-        elif vis < 3 or (ceiling is not None and ceiling < 1000):
-            return "IFR"
-        elif vis <= 5 or (ceiling is not None and ceiling <= 3000):
-            return "MVFR"  # Marginal VFR
-        else:
-            return "VFR"
-    
+        return cls._calculate_flight_categories([metar])[0]
+
+    @classmethod
+    def _calculate_flight_categories(cls, records):
+        """Flight categories for a batch of API records, from visibility and the lowest ceiling.
+
+        Returns one category per record, or None for a record with neither
+        visibility nor cloud data to go on.
+        """
+        categories = []
+        for metar in records:
+            visib = metar.get("visib")
+            clouds = metar.get("clouds") or []
+            if visib in (None, "") and not clouds:
+                categories.append(None)
+                continue
+
+            ceiling = min(
+                (cloud["base"] for cloud in clouds
+                 if (cloud.get("cover") or "").upper() in CEILING_COVERS and cloud.get("base") is not None),
+                default=None,
+            )
+            categories.append(flight_category_for(_statute_miles(visib), ceiling))
+        return categories
+
     @classmethod
-    def from_json(cls, json_data):
-        """Parse JSON data from new API v4.0"""
+    def from_json(cls, json_data, stations=None):
+        """Parse JSON data from new API v4.0, keeping the latest record per station.
+
+        `stations` (any container of station IDs) limits parsing to those stations.
+        """
         cls_instance = cls()
 
-        # Group records by station ID to handle multiple records per airport
-        station_records = defaultdict(list)
+        # One pass: only the record with the latest obsTime survives for each station
+        latest_records = {}
         for metar in json_data:
             stationId = metar.get("icaoId")
-            if not stationId:
+            if not stationId or (stations is not None and stationId not in stations):
                 continue
+            latest = latest_records.get(stationId)
+            if latest is None or (metar.get("obsTime") or 0) > (latest.get("obsTime") or 0):
+                latest_records[stationId] = metar
 
-            station_records[stationId].append(metar)
-
-        # Process each station, taking the latest record
-        for stationId, records in station_records.items():
-            # Find the record with the latest obsTime
-            latest_record = max(records, key=lambda r: r.get("obsTime", 0))
-            metar = latest_record
+        # Use flight category from API (fltCat field), deriving the missing ones in one batch
+        missing = [stationId for stationId, metar in latest_records.items() if not metar.get("fltCat")]
+        derived = dict(zip(missing, cls._calculate_flight_categories([latest_records[stationId] for stationId in missing])))
+        if missing:
+            logger.info(f"Derived flight category for {len(missing)} station(s) without fltCat")
 
-            # Use flight category from API (fltCat field)
-            flightCategory = metar.get("fltCat")
+        for stationId, metar in latest_records.items():
+            flightCategory = metar.get("fltCat") or derived[stationId]
             if not flightCategory:
-                logger.warning(f"{stationId}: No flight category in API response, skipping")
+                logger.warning(f"{stationId}: No flight category or data to derive it from, skipping")
                 continue
-                
-            # Handle wind direction - can be integer (degrees) or string ("VRB" for variable)
-            wdir_raw = metar.get("wdir")
-            if wdir_raw is not None:
-                windDir = str(wdir_raw)
-            else:
-                windDir = ""
-            windSpeed = metar.get("wspd", 0) or 0
-            windGustSpeed = metar.get("wgst", 0) or 0
-            windGust = False
-            lightning = False
-            tempC = int(round(metar.get("temp", 0))) if metar.get("temp") is not None else 0
-            dewpointC = int(round(metar.get("dewp", 0))) if metar.get("dewp") is not None else 0
-            vis = 0
-            altimHg = (metar.get("altim", 0.0) / 33.8639) if metar.get("altim") else 0.0  # Convert hPa to inHg
-            obs = metar.get("wxString", "") or ""
-            latitude = metar.get("lat", 0)
-            longitude = metar.get("lon", 0)
-            skyConditions = []
-            obsTime = None
-
-            if metar.get("visib"):
-                vis_str = str(metar.get("visib")).replace("+", "")
-                try:
-                    vis = int(round(float(vis_str)))
-                except (ValueError, TypeError):
-                    vis = 0
-
-            if metar.get("obsTime"):
-                try:
-                    # obsTime is a Unix timestamp
-                    obsTime = datetime.datetime.fromtimestamp(
-                        metar.get("obsTime"), tz=datetime.timezone.utc
-                    )
-                except (ValueError, TypeError, OSError):
-                    obsTime = None
-
-            if metar.get("clouds"):
-                for cloud in metar.get("clouds", []):
-                    skyCond = {
-                        "cover": cloud.get("cover"),
-                        "cloudBaseFt": cloud.get("base", 0),
-                    }
-                    skyConditions.append(skyCond)
-
-            cls_instance[stationId] = MetarInfo(
-                stationId, flightCategory, windDir, windSpeed, windGustSpeed, windGust, lightning,
-                tempC, dewpointC, vis, altimHg, obs, skyConditions, latitude, longitude, obsTime
-            )
+
+            cls_instance[stationId] = MetarInfo.from_json_record(stationId, flightCategory, metar)
         return cls_instance
 
     @classmethod
     def from_xml(cls, xml_data):
-        cls = MetarInfos()
+        """Parse an XML API response, streaming one <METAR> at a time.
 
-        root = ET.fromstring(xml_data)
-        for metar in root.iter("METAR"):
-            stationId = metar.find("station_id").text
-            if metar.find("flight_category") is None:
-                print("Missing flight condition, skipping.")
+        `xml_data` is the document itself (str or bytes), or a path or binary file
+        object for large cache files. Each METAR's children are read in a single
+        pass and the element is then detached from its parent (<data>), so memory
+        stays bounded by one METAR rather than the whole document.
+        """
+        metar_infos = cls()
+        if isinstance(xml_data, str) and xml_data.lstrip().startswith("<"):
+            xml_data = xml_data.encode()
+        if isinstance(xml_data, (bytes, bytearray)):
+            xml_data = io.BytesIO(xml_data)
+
+        # Elements opened but not yet closed; the last one is the parent of the element that just ended
+        open_elements = []
+        for event, element in ET.iterparse(xml_data, events=("start", "end")):
+            if event == "start":
+                open_elements.append(element)
                 continue
-            flightCategory = metar.find("flight_category").text
-            windDir = ""
-            windSpeed = 0
-            windGustSpeed = 0
-            windGust = False
-            lightning = False
-            tempC = 0
-            dewpointC = 0
-            vis = 0
-            altimHg = 0.0
-            obs = ""
-            latitude = 0
-            longitude = 0
-            skyConditions = []
-            obsTime = None
-
-            if metar.find('latitude') is not None:
-                latitude = float(metar.find('latitude').text)
-            if metar.find('longitude') is not None:
-                longitude = float(metar.find('longitude').text)
-            if metar.find("wind_gust_kt") is not None:
-                windGustSpeed = int(metar.find("wind_gust_kt").text)
-                # windGust = (True if (ALWAYS_BLINK_FOR_GUSTS or windGustSpeed > WIND_BLINK_THRESHOLD) else False)
-            if metar.find("wind_speed_kt") is not None:
-                windSpeed = int(metar.find("wind_speed_kt").text)
-            if metar.find("wind_dir_degrees") is not None:
-                windDir = metar.find("wind_dir_degrees").text
-            if metar.find("temp_c") is not None:
-                tempC = int(round(float(metar.find("temp_c").text)))
-            if metar.find("dewpoint_c") is not None:
-                dewpointC = int(round(float(metar.find("dewpoint_c").text)))
-            if metar.find("visibility_statute_mi") is not None:
-                vis_str = metar.find("visibility_statute_mi").text
-                vis_str = vis_str.replace("+", "")
-                vis = int(round(float(vis_str)))
-            if metar.find("altim_in_hg") is not None:
-                altimHg = float(round(float(metar.find("altim_in_hg").text), 2))
-            if metar.find("wx_string") is not None:
-                obs = metar.find("wx_string").text
-            if metar.find("observation_time") is not None:
-                obsTime = datetime.datetime.fromisoformat(
-                    metar.find("observation_time").text.replace("Z", "+00:00")
-                ).replace(tzinfo=datetime.timezone.utc)
-            for skyIter in metar.iter("sky_condition"):
-                skyCond = {
-                    "cover": skyIter.get("sky_cover"),
-                    "cloudBaseFt": int(skyIter.get("cloud_base_ft_agl", default=0)),
-                }
-                skyConditions.append(skyCond)
-            cls[stationId] = MetarInfo(
-                stationId,
-                flightCategory,
-                windDir,
-                windSpeed,
-                windGustSpeed,
-                windGust,
-                lightning,
-                tempC,
-                dewpointC,
-                vis,
-                altimHg,
-                obs,
-                skyConditions,
-                latitude,
-                longitude,
-                obsTime
-            )
-        return cls
-    
-def get_metar_data():
-    stations = ",".join(AIRPORT_CODES)
-    url = f"https://aviationweather.gov/api/data/metar?ids={stations}&format=json&hours=1.5"
+            open_elements.pop()
+            if element.tag != "METAR":
+                continue
+
+            metar_info = _metar_info_from_xml(element)
+            if metar_info is not None:
+                metar_infos[metar_info.airport_code] = metar_info
+            if open_elements:
+                open_elements[-1].remove(element)
+        return metar_infos
+
+    @classmethod
+    def from_csv(cls, lines, stations=None):
+        """Parse the bulk CSV format (metars.cache.csv) from an iterable of text lines.
+
+        The file starts with a few status lines before the header row, and repeats
+        the sky_cover / cloud_base_ft_agl columns once per cloud layer, so columns
+        are looked up by position. Rows for stations outside `stations` (when
+        given) are skipped before any field is converted.
+        """
+        metar_infos = cls()
+        rows = csv.reader(lines)
+        for header in rows:
+            if header and header[0] == "raw_text":
+                break
+        else:
+            raise ValueError("No header row in METAR CSV data")
+
+        station_column = header.index("station_id")
+        columns = [
+            (name, index) for index, name in enumerate(header)
+            if name in _CSV_FIELDS
+        ]
+        sky_columns = [
+            (index, index + 1) for index, name in enumerate(header)
+            if name == "sky_cover" and index + 1 < len(header) and header[index + 1] == "cloud_base_ft_agl"
+        ]
+        width = len(header)
+
+        for row in rows:
+            if len(row) < width:
+                continue
+            stationId = row[station_column]
+            if stations is not None and stationId not in stations:
+                continue
+
+            fields = {}
+            for name, index in columns:
+                if row[index]:
+                    fields.setdefault(name, row[index])
+            skyConditions = [
+                {"cover": row[cover], "cloudBaseFt": int(row[base] or 0)}
+                for cover, base in sky_columns if row[cover]
+            ]
+            metar_info = _metar_info_from_fields(fields, skyConditions)
+            if metar_info is not None:
+                metar_infos[stationId] = metar_info
+        return metar_infos
+
+
+# CSV columns (named like the XML tags) that MetarInfo is built from
+_CSV_FIELDS = {
+    "raw_text", "station_id", "observation_time", "latitude", "longitude", "temp_c", "dewpoint_c",
+    "wind_dir_degrees", "wind_speed_kt", "wind_gust_kt", "visibility_statute_mi",
+    "altim_in_hg", "wx_string", "flight_category", "elevation_m",
+}
+
+
+def _metar_info_from_xml(metar):
+    """MetarInfo for one <METAR> element, or None if it has no flight category"""
+    fields = {}
+    skyConditions = []
+    for child in metar:
+        if child.tag == "sky_condition":
+            skyConditions.append({
+                "cover": child.get("sky_cover"),
+                "cloudBaseFt": int(child.get("cloud_base_ft_agl", default=0)),
+            })
+        else:
+            # Like find(): the first occurrence of a tag wins
+            fields.setdefault(child.tag, child.text)
+    return _metar_info_from_fields(fields, skyConditions)
+
 
-    logger.info(f"Fetching METAR data for {len(AIRPORT_CODES)} airports")
-    logger.debug(f"API URL: {url}")
+def _metar_info_from_fields(fields, skyConditions):
+    """MetarInfo from the XML/CSV field names (tag or column) and their text values"""
+    stationId = fields.get("station_id")
+    if "flight_category" not in fields:
+        logger.warning(f"{stationId}: Missing flight condition, skipping.")
+        return None
 
+    obsTime = None
+    if "observation_time" in fields:
+        obsTime = datetime.datetime.fromisoformat(
+            fields["observation_time"].replace("Z", "+00:00")
+        ).replace(tzinfo=datetime.timezone.utc)
+
+    rawText = fields.get("raw_text") or ""
+    windGustSpeed, windGust, lightning = _raw_text_effects(
+        rawText, int(fields["wind_gust_kt"]) if "wind_gust_kt" in fields else 0)
+
+    return MetarInfo(
+        stationId,
+        fields["flight_category"],
+        fields.get("wind_dir_degrees", ""),
+        int(fields["wind_speed_kt"]) if "wind_speed_kt" in fields else 0,
+        windGustSpeed,
+        windGust,
+        lightning,
+        int(round(float(fields["temp_c"]))) if "temp_c" in fields else 0,
+        int(round(float(fields["dewpoint_c"]))) if "dewpoint_c" in fields else 0,
+        int(round(float(fields["visibility_statute_mi"].replace("+", "")))) if "visibility_statute_mi" in fields else 0,
+        float(round(float(fields["altim_in_hg"]), 2)) if "altim_in_hg" in fields else 0.0,
+        fields.get("wx_string", ""),
+        skyConditions,
+        float(fields["latitude"]) if "latitude" in fields else 0,
+        float(fields["longitude"]) if "longitude" in fields else 0,
+        obsTime,
+        rawText,
+        temperature=float(fields["temp_c"]) if "temp_c" in fields else None,
+        dewpoint=float(fields["dewpoint_c"]) if "dewpoint_c" in fields else None,
+        visibility=_reported_visibility(fields.get("visibility_statute_mi")),
+        altimeter=float(fields["altim_in_hg"]) * 33.8639 if "altim_in_hg" in fields else None,
+        elevation=float(fields["elevation_m"]) if "elevation_m" in fields else None,
+    )
+
+
+def _reported_visibility(text):
+    """Visibility text from XML/CSV as the JSON API reports it: a number, or e.g. "10+" """
+    if not text:
+        return None
+    if text.endswith("+"):
+        return text
     try:
-        response = requests.get(url, timeout=30)
+        return float(text)
+    except ValueError:
+        return text
+
+
+METAR_API_URL = "https://aviationweather.gov/api/data/metar"
+
+
+class StationChunk:
+    """One ids= query's worth of stations, with the validators and data from its last response"""
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.station_set = frozenset(stations)
+        self.url = f"{METAR_API_URL}?ids={','.join(stations)}&format=json&hours=1.5"
+
+        self.etag = None
+        self.last_modified = None
+        self.body_hash = None
+        self.metar_infos = None
+
+    def conditional_headers(self):
+        if self.metar_infos is None:
+            return {}
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class MetarFetcher:
+    """Fetches METAR data over one pooled session, skipping work when nothing changed.
+
+    Stations are split into chunks of `chunk_size` (keeping URLs and responses
+    within API limits) that are fetched concurrently by up to `workers` threads.
+    Each chunk's request is conditional on the validators (ETag / Last-Modified)
+    from its last response and asks for a compressed body; a 304, or a body that
+    hashes the same as last time, reuses that chunk's previous parse. A chunk
+    that fails keeps its previous data, so only its own stations go stale.
+
+    When no chunk has new data, fetch() returns the previously merged MetarInfos
+    object itself, so callers can detect "no new data" with an identity check.
+    """
+
+    def __init__(self, stations=FETCH_STATIONS, session=None, timeout=30,
+                 chunk_size=METAR_CHUNK_SIZE, workers=METAR_FETCH_WORKERS):
+        self.station_count = len(stations)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.chunks = self._chunk(stations)
+        self.workers = max(1, min(workers, len(self.chunks)))
+
+        if session is None:
+            session = requests.Session()
+            # One keep-alive connection per worker thread
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            session.mount("https://", adapter)
+        self.session = session
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        self.metar_infos = None
+
+    def fetch(self, stations=None):
+        """Fetch every station, or only `stations` (a partial refresh) when given.
+
+        A partial refresh returns a MetarInfos holding just those stations, for the
+        caller to merge into what it already has.
+        """
+        if stations is not None:
+            return self._fetch_stations(stations)
+
+        logger.info(f"Fetching METAR data for {self.station_count} airports in {len(self.chunks)} chunk(s)")
+        results = self._fetch_chunks(self.chunks)
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(self.chunks):
+            raise errors[0]
+        if self.metar_infos is not None and not any(result is True for result in results):
+            logger.info("METAR data unchanged since last fetch")
+            return self.metar_infos
+
+        metar_infos = self._merge(self.chunks)
+        logger.info(f"Merged {len(metar_infos)} METAR records ({len(errors)} failed chunk(s))")
+
+        self.metar_infos = metar_infos
+        return metar_infos
+
+    def _fetch_stations(self, stations):
+        # The station set changes from call to call, so these chunks carry no validators over
+        chunks = self._chunk(stations)
+        logger.info(f"Fetching METAR data for {len(stations)} due airports in {len(chunks)} chunk(s)")
+
+        results = self._fetch_chunks(chunks)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(chunks):
+            raise errors[0]
+        return self._merge(chunks)
+
+    def _chunk(self, stations):
+        return [StationChunk(stations[start:start + self.chunk_size]) for start in range(0, len(stations), self.chunk_size)]
+
+    def _fetch_chunks(self, chunks):
+        if self.workers == 1 or len(chunks) == 1:
+            return [self._fetch_chunk_safely(index, chunk, len(chunks)) for index, chunk in enumerate(chunks)]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="metar-fetch") as executor:
+            return list(executor.map(self._fetch_chunk_safely, range(len(chunks)), chunks, [len(chunks)] * len(chunks)))
+
+    @staticmethod
+    def _merge(chunks):
+        metar_infos = MetarInfos()
+        for chunk in chunks:
+            if chunk.metar_infos is not None:
+                metar_infos.update(chunk.metar_infos)
+        return metar_infos
+
+    def _fetch_chunk_safely(self, index, chunk, chunk_count):
+        """Fetch one chunk. Returns True if its data changed, False if not, or the exception it hit."""
+        start = time.monotonic()
+        try:
+            changed, status = self._fetch_chunk(chunk)
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Chunk {index + 1}/{chunk_count} ({len(chunk.stations)} stations) failed "
+                         f"after {time.monotonic() - start:.2f}s: {e}")
+            return e
+        logger.info(f"Chunk {index + 1}/{chunk_count}: {len(chunk.stations)} stations, "
+                    f"HTTP {status}{'' if changed else ' (unchanged)'} in {time.monotonic() - start:.2f}s")
+        return changed
+
+    def _fetch_chunk(self, chunk):
+        logger.debug(f"API URL: {chunk.url}")
+        response = self.session.get(chunk.url, headers=chunk.conditional_headers(), timeout=self.timeout)
+        if response.status_code == 304 and chunk.metar_infos is not None:
+            return False, response.status_code
         response.raise_for_status()
-        logger.info(f"Successfully fetched METAR data - HTTP {response.status_code}")
+
+        chunk.etag = response.headers.get("ETag")
+        chunk.last_modified = response.headers.get("Last-Modified")
+        body_hash = hashlib.sha1(response.content).digest()
+        if body_hash == chunk.body_hash and chunk.metar_infos is not None:
+            return False, response.status_code
 
         json_data = response.json()
-        logger.info(f"Received {len(json_data)} METAR records from API")
+        metar_infos = MetarInfos.from_json(json_data, stations=chunk.station_set)
+        logger.debug(f"Parsed {len(metar_infos)} of {len(json_data)} METAR records")
+
+        # Only remember the payload once it parsed, so a bad body is retried in full
+        chunk.body_hash = body_hash
+        chunk.metar_infos = metar_infos
+        return True, response.status_code
+
+
+class MetarCsvSource:
+    """Loads METAR data from a metars.cache.csv.gz bulk file, at a local path or http(s) URL.
+
+    The file is decompressed and parsed a line at a time as it is read, so the
+    worldwide file never has to fit in memory. Every load is a full one: the
+    file holds every station, so a partial refresh would cost the same download
+    and parse. A local file is re-read only when its modification time or size
+    changes, and a mirror URL is requested conditionally on the ETag /
+    Last-Modified of its last response, so polling an unchanged file is cheap.
+    Like MetarFetcher, an unchanged file returns the previous MetarInfos object.
+    """
+
+    def __init__(self, location, stations=FETCH_STATIONS, session=None, timeout=30,
+                 time_budget=METAR_CSV_TIME_BUDGET):
+        self.location = location
+        self.station_set = frozenset(stations)
+        self.session = session
+        self.timeout = timeout
+        self.time_budget = time_budget
 
-        metar_infos = MetarInfos.from_json(json_data)
-        logger.info(f"Successfully parsed {len(metar_infos)} METAR records")
+        # (mtime, size) of a local file, or (ETag, Last-Modified) of a mirror's response
+        self.validators = None
+        self.metar_infos = None
 
+    def fetch(self, stations=None):
+        """Every station from the bulk file; `stations` is ignored, since the file holds them all"""
+        start = time.monotonic()
+        if self.location.startswith(("http://", "https://")):
+            metar_infos = self._load_url()
+        else:
+            metar_infos = self._load_file()
+        if metar_infos is None:
+            logger.info(f"METAR bulk file {self.location} unchanged since last load")
+            return self.metar_infos
+
+        elapsed = time.monotonic() - start
+        logger.info(f"Loaded {len(metar_infos)} METAR records from {self.location} in {elapsed:.2f}s")
+        if elapsed > self.time_budget:
+            logger.warning(f"Loading {self.location} took {elapsed:.2f}s, over the {self.time_budget}s budget")
+        self.metar_infos = metar_infos
         return metar_infos
 
+    def _load_file(self):
+        stat = os.stat(self.location)
+        validators = (stat.st_mtime_ns, stat.st_size)
+        if validators == self.validators and self.metar_infos is not None:
+            return None
+        with gzip.open(self.location, "rt", newline="") as lines:
+            metar_infos = MetarInfos.from_csv(lines, self.station_set)
+        self.validators = validators
+        return metar_infos
+
+    def _load_url(self):
+        if self.session is None:
+            self.session = requests.Session()
+        headers = {}
+        if self.validators is not None and self.metar_infos is not None:
+            etag, last_modified = self.validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        with self.session.get(self.location, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304 and self.metar_infos is not None:
+                return None
+            response.raise_for_status()
+            # Undo any transfer encoding; the file itself is still gzipped
+            response.raw.decode_content = True
+            with gzip.open(response.raw, "rt", newline="") as lines:
+                metar_infos = MetarInfos.from_csv(lines, self.station_set)
+            self.validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return metar_infos
+
+
+def load_metar_csv(location, stations=FETCH_STATIONS, session=None, timeout=30):
+    """MetarInfos for `stations` from a metars.cache.csv.gz file, at a local path or http(s) URL"""
+    return MetarCsvSource(location, stations, session, timeout).fetch()
+
+
+_fetcher = None
+
+
+def get_metar_data(stations=None):
+    """Latest METAR data for every airport and SHARED_STATIONS (or just `stations`).
+
+    Comes from the METAR_CSV_SOURCE bulk file when one is configured (always
+    every station), otherwise from the API. Either way the shared source returns
+    the same MetarInfos object as its previous full load when nothing changed.
+    """
+    global _fetcher
+
+    try:
+        if _fetcher is None:
+            _fetcher = MetarCsvSource(METAR_CSV_SOURCE) if METAR_CSV_SOURCE else MetarFetcher()
+        return _fetcher.fetch(stations)
+
     except requests.RequestException as e:
         logger.error(f"Failed to fetch METAR data: {e}")
         raise
     except ValueError as e:
-        logger.error(f"Failed to parse JSON response: {e}")
+        logger.error(f"Failed to parse METAR data: {e}")
         raise
     except Exception as e:
         logger.error(f"Unexpected error in get_metar_data: {e}")
-        raise
\ No newline at end of file
+        raise
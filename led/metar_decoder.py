@@ -0,0 +1,69 @@
+import re
+from collections import namedtuple
+
+DecodedMetar = namedtuple(
+    "DecodedMetar",
+    "wind_dir wind_speed wind_gust weather thunderstorm lightning rvr remarks",
+)
+
+# Every report group we care about, as one precompiled alternation matched against whole tokens.
+# A weather group needs at least one phenomenon after its intensity or VC; TS and
+# VCSH are the only descriptors that stand alone.
+_TOKEN = re.compile(r"""
+    (?P<wind>(?P<wdir>\d{3}|VRB)(?P<wspd>\d{2,3})(?:G(?P<gust>\d{2,3}))?(?P<unit>KT|MPS))
+  | (?P<rvr>R(?P<runway>\d{2}[LCR]?)/(?P<range>[PM]?\d{4}(?:V[PM]?\d{4})?)(?:FT)?(?:/?[UDN])?)
+  | (?P<wx>(?:[-+]|(?P<vicinity>VC))?
+        (?:(?:MI|PR|BC|DR|BL|SH|TS|FZ)?(?:DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|FC|SS|DS)+
+         | TS | (?<=VC)SH))
+""", re.VERBOSE)
+
+# Day and time group (ddhhmmZ); the report groups follow it
+_TIME = re.compile(r"\d{6}Z")
+
+# Lightning reported in remarks, e.g. "LTG DSNT NE", "OCNL LTGICCG OHD"
+_LIGHTNING_REMARK = re.compile(r"\bLTG(?:IC|CG|CC|CA)*\b")
+
+_MPS_TO_KT = 1.94384
+
+
+def decode_metar(raw_text):
+    """Decode the report groups the LED map uses from a raw METAR/SPECI string.
+
+    Returns a DecodedMetar: wind direction (degrees, "VRB" or None), wind speed and
+    gust in knots (None if absent), present weather groups, whether a thunderstorm
+    is reported at the station (TS in present weather, not VCTS in the vicinity),
+    whether lightning is (a thunderstorm or LTG in the remarks), runway visual
+    ranges as (runway, range) pairs, and the remarks text.
+    """
+    body, _separator, remarks = raw_text.partition(" RMK ")
+    tokens = body.split()
+    # Groups are read from after the station and time (e.g. "METAR KSLC 250054Z"),
+    # so a station ID made only of weather letters is never taken for weather
+    start = next((index + 1 for index, token in enumerate(tokens[:3]) if _TIME.fullmatch(token)), 1)
+
+    wind_dir = wind_speed = wind_gust = None
+    weather = []
+    thunderstorm = False
+    rvr = []
+    match_token = _TOKEN.fullmatch
+    for token in tokens[start:]:
+        match = match_token(token)
+        if match is None:
+            continue
+        group = match.lastgroup
+        if group == "wx":
+            weather.append(token)
+            thunderstorm = thunderstorm or ("TS" in token and not match["vicinity"])
+        elif group == "rvr":
+            rvr.append((match["runway"], match["range"]))
+        elif match["wind"] and wind_speed is None:
+            wdir = match["wdir"]
+            wind_dir = wdir if wdir == "VRB" else int(wdir)
+            wind_speed = int(match["wspd"])
+            wind_gust = int(match["gust"]) if match["gust"] else None
+            if match["unit"] == "MPS":
+                wind_speed = round(wind_speed * _MPS_TO_KT)
+                wind_gust = round(wind_gust * _MPS_TO_KT) if wind_gust is not None else None
+
+    lightning = thunderstorm or _LIGHTNING_REMARK.search(remarks) is not None
+    return DecodedMetar(wind_dir, wind_speed, wind_gust, weather, thunderstorm, lightning, rvr, remarks.strip())
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+
+from constants import METAR_CSV_SOURCE
+from metar_cache import MetarCache
+from metar_data import get_metar_data
+from refresh_scheduler import RefreshScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class MetarRefresher:
+    """Fetches METAR data on a background thread so the frame loop never blocks on the network"""
+
+    def __init__(self, fetch=get_metar_data, cache=None, scheduler=None, publish=None, clock=time.monotonic,
+                 full_fetches_only=bool(METAR_CSV_SOURCE)):
+        # The cache absorbs fetch errors and decides when to retry; while fetches
+        # succeed, the scheduler picks the next poll from stations' report times
+        self.cache = cache if cache is not None else MetarCache(fetch)
+        self.scheduler = scheduler if scheduler is not None else RefreshScheduler()
+        # Called with (version, MetarInfos) for every fetched snapshot, on the
+        # refresher thread (e.g. to share it with the other services on the box)
+        self.publish = publish
+        self.clock = clock
+        # A bulk file source holds every station, so asking for fewer saves nothing
+        self.full_fetches_only = full_fetches_only
+        self._last_full_fetch = None
+
+        # (version, MetarInfos) — always replaced as a whole, so a reader sees
+        # either the previous snapshot or the new one, never a half-built one
+        self._snapshot = (0, None)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def snapshot(self):
+        """Latest published (version, MetarInfos) pair. Version 0 means no data yet."""
+        return self._snapshot
+
+    def seed(self, metar_infos):
+        """Publish data from elsewhere (e.g. a warm-restart snapshot) until the first fetch lands"""
+        self.cache.seed(metar_infos)
+        self.scheduler.observe(metar_infos)
+        version = self._snapshot[0] + 1
+        self._snapshot = (version, metar_infos)
+        logger.info(f"Seeded weather snapshot v{version} with {len(metar_infos)} airports")
+        return version
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="metar-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self):
+        """Fetch and parse a new snapshot, then publish it with a single reference swap.
+
+        When the cache hands back the current MetarInfos object (nothing changed
+        upstream, or the fetch failed) the current version is kept, so the frame
+        loop has nothing to redo.
+        """
+        current_version, current_infos = self._snapshot
+        stations = self._stations_to_fetch(current_infos)
+        fetched_at = self.clock()
+        metar_infos = self.cache.refresh(stations)
+        if metar_infos is not None and not self.cache.failures:
+            self.scheduler.observe(metar_infos)
+            if stations is None:
+                self._last_full_fetch = fetched_at
+        if metar_infos is None or metar_infos is current_infos:
+            logger.info(f"Weather unchanged, keeping snapshot v{current_version}")
+            return current_version
+        version = current_version + 1
+        self._snapshot = (version, metar_infos)
+        logger.info(f"Published weather snapshot v{version} for {len(metar_infos)} airports")
+        if self.publish is not None:
+            self.publish(version, metar_infos)
+        return version
+
+    def _stations_to_fetch(self, current_infos):
+        """Only the stations with a report due, once there is data to merge into.
+
+        Returns None (fetch everything) for the first fetch, when no report is due
+        (a periodic poll that catches SPECIs anywhere), when all are due, and when
+        the last successful full fetch is a sparse interval old, so a station that
+        stays due can't keep the others from being refreshed. Always None with
+        `full_fetches_only`.
+        """
+        if current_infos is None or self.full_fetches_only or self._full_fetch_due():
+            return None
+        due = self.scheduler.due_stations()
+        if not due or len(due) == len(self.scheduler.stations):
+            return None
+        return due
+
+    def _full_fetch_due(self):
+        return self._last_full_fetch is None or self.clock() - self._last_full_fetch >= self.scheduler.sparse_interval
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot and try again at the next poll
+                logger.error(f"Background METAR refresh failed: {e}")
+            self._stop_event.wait(self.cache.next_delay(self.scheduler.next_delay()))
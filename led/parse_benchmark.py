@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Parse benchmark — times MetarInfos.from_json on a synthetic API payload,
+load_metar_csv on a synthetic worldwide metars.cache.csv.gz bulk file, and
+the raw METAR decoder.
+Run with: python3 parse_benchmark.py [--records 5000] [--csv-rows 10000] [--csv-budget 5] [--repeat 20]
+
+Compares parsing every station, parsing only the map's airports, and parsing
+every station then reading every field (the conversion work from_json used
+to do up front). Reports the best time per parse, peak allocated memory, and
+the memory the parsed MetarInfos still hold once the JSON records are dropped.
+The bulk CSV load is checked against METAR_CSV_TIME_BUDGET (run on the Pi
+Zero itself for a meaningful result); the exit status is 1 when it is over.
+"""
+
+import argparse
+import csv
+import gc
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from airports import AIRPORT_CODES
+from constants import FLIGHT_CATEGORY_TO_COLOR, METAR_CSV_TIME_BUDGET
+from metar_data import MetarInfos, load_metar_csv
+from metar_decoder import decode_metar
+
+# Every field MetarInfo can convert lazily
+LAZY_FIELDS = ["windDir", "tempC", "dewpointC", "vis", "altimHg", "obs", "skyConditions", "observation_time"]
+
+
+def synthetic_json_records(count, records_per_station=2, seed=0):
+    """API v4.0 style records: the map's airports plus made-up stations, several reports each"""
+    rng = random.Random(seed)
+    categories = list(FLIGHT_CATEGORY_TO_COLOR)
+    station_count = count // records_per_station
+    stations = (list(AIRPORT_CODES) + [f"X{index:03d}" for index in range(station_count)])[:station_count]
+
+    records = []
+    base_time = int(time.time()) - 90 * 60
+    for report in range(records_per_station):
+        for station in stations:
+            records.append({
+                "icaoId": station,
+                "obsTime": base_time + report * 3600 + rng.randint(0, 600),
+                "temp": rng.uniform(-10, 35),
+                "dewp": rng.uniform(-15, 20),
+                "wdir": rng.choice([rng.randint(0, 36) * 10, "VRB"]),
+                "wspd": rng.randint(0, 25),
+                "wgst": rng.choice([None, None, rng.randint(15, 40)]),
+                "visib": rng.choice(["10+", 5, 2.5, 0.75]),
+                "altim": rng.uniform(990, 1035),
+                "wxString": rng.choice([None, "-RA", "BR", "+TSRA"]),
+                "lat": rng.uniform(25, 49),
+                "lon": rng.uniform(-124, -67),
+                "fltCat": rng.choice(categories),
+                "clouds": [{"cover": "BKN", "base": 2500}, {"cover": "OVC", "base": 8000}],
+            })
+    return records
+
+
+CSV_HEADER = [
+    "raw_text", "station_id", "observation_time", "latitude", "longitude", "temp_c", "dewpoint_c",
+    "wind_dir_degrees", "wind_speed_kt", "wind_gust_kt", "visibility_statute_mi", "altim_in_hg",
+    "sea_level_pressure_mb", "corrected", "auto", "auto_station", "maintenance_indicator_on", "no_signal",
+    "lightning_sensor_off", "freezing_rain_sensor_off", "present_weather_sensor_off", "wx_string",
+    "sky_cover", "cloud_base_ft_agl", "sky_cover", "cloud_base_ft_agl", "sky_cover", "cloud_base_ft_agl",
+    "sky_cover", "cloud_base_ft_agl", "flight_category", "three_hr_pressure_tendency_mb", "maxT_c", "minT_c",
+    "maxT24hr_c", "minT24hr_c", "precip_in", "pcp3hr_in", "pcp6hr_in", "pcp24hr_in", "snow_in",
+    "vert_vis_ft", "metar_type", "elevation_m",
+]
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    """A gzipped bulk file like metars.cache.csv.gz, including its status preamble"""
+    rng = random.Random(seed)
+    records = synthetic_json_records(rows, records_per_station=1, seed=seed)
+    with gzip.open(path, "wt", newline="") as f:
+        f.write(f"No errors\nNo warnings\n{rng.randint(5, 50)} ms\ndata source=metars\n{rows} results\n")
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for record in records:
+            observed = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(record["obsTime"]))
+            writer.writerow([
+                f"{record['icaoId']} 250054Z 35010KT 10SM BKN025 OVC080 30/11 A3004", record["icaoId"], observed,
+                f"{record['lat']:.3f}", f"{record['lon']:.3f}", f"{record['temp']:.1f}", f"{record['dewp']:.1f}",
+                record["wdir"], record["wspd"], record["wgst"] or "", record["visib"],
+                f"{record['altim'] / 33.8639:.2f}", "", "", "TRUE", "", "", "", "", "", "", record["wxString"] or "",
+                "BKN", 2500, "OVC", 8000, "", "", "", "", record["fltCat"],
+                "", "", "", "", "", "", "", "", "", "", "", "METAR", rng.randint(0, 2000),
+            ])
+
+
+RAW_REPORTS = [
+    "KSLC 250054Z 35010KT 10SM FEW080 SCT140 BKN250 30/11 A3004 RMK AO2 SLP136 T03000106",
+    "KDEN 251953Z 27025G38KT 10SM -TSRA VCSH FEW080CB BKN120 28/09 A3012 RMK AO2 PK WND 27045/1932 LTG DSNT ALQDS",
+    "KJFK 251951Z 04005KT 1/2SM R04R/2000V4000FT/D +RA BR OVC004 21/20 A2990 RMK AO2 SLP126",
+    "EGLL 251950Z VRB03MPS 9999 -SHRA SCT020 18/12 Q1012 NOSIG",
+]
+
+
+def parse_all_stations(records):
+    return MetarInfos.from_json(records)
+
+
+def parse_everything(records):
+    metar_infos = MetarInfos.from_json(records)
+    for metar_info in metar_infos.values():
+        for field in LAZY_FIELDS:
+            getattr(metar_info, field)
+    return metar_infos
+
+
+def parse_map_airports(records):
+    return MetarInfos.from_json(records, stations=frozenset(AIRPORT_CODES))
+
+
+def measure(parse, records, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(records)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(records)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def retained(parse, records):
+    """Bytes still held by the parse's output after the decoded JSON records are released"""
+    payload = json.dumps(records)
+    gc.collect()
+    tracemalloc.start()
+    decoded = json.loads(payload)
+    metar_infos = parse(decoded)
+    del decoded
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del metar_infos
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark METAR JSON parsing")
+    parser.add_argument("--records", type=int, default=5000, help="Records in the synthetic payload")
+    parser.add_argument("--csv-rows", type=int, default=10000, help="Rows in the synthetic bulk CSV file")
+    parser.add_argument("--csv-budget", type=float, default=METAR_CSV_TIME_BUDGET,
+                        help="Seconds the bulk CSV load may take (exit status 1 if over)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed parses per case (best is reported)")
+    args = parser.parse_args()
+
+    records = synthetic_json_records(args.records)
+    print(f"from_json on {len(records)} records, {len(AIRPORT_CODES)} airports on the map\n")
+    print(f"{'Case':<34} {'ms':>8} {'peak KiB':>10}")
+    print("-" * 54)
+    for name, parse in [
+        ("all stations", parse_all_stations),
+        ("map airports only", parse_map_airports),
+        ("all stations, every field read", parse_everything),
+    ]:
+        elapsed, peak = measure(parse, records, args.repeat)
+        print(f"{name:<34} {elapsed * 1000:>8.2f} {peak / 1024:>10.1f}")
+
+    print(f"\n{'Retained after parsing':<34} {'KiB':>19}")
+    for name, parse in [("all stations", parse_all_stations), ("all stations, every field read", parse_everything)]:
+        print(f"{name:<34} {retained(parse, records) / 1024:>19.1f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "metars.cache.csv.gz")
+        write_synthetic_csv(path, args.csv_rows)
+        print(f"\nload_metar_csv on {args.csv_rows} rows ({os.path.getsize(path) / 1024:.0f} KiB gzipped)\n")
+        elapsed, peak = measure(lambda location: load_metar_csv(location), path, max(1, args.repeat // 4))
+        print(f"{'map airports from bulk CSV':<34} {elapsed * 1000:>8.2f} {peak / 1024:>10.1f}")
+        within_budget = elapsed <= args.csv_budget
+        print(f"{'budget':<34} {args.csv_budget * 1000:>8.0f} {'ok' if within_budget else 'OVER':>10}")
+
+    reports = RAW_REPORTS * 5000
+    start = time.perf_counter()
+    for raw_text in reports:
+        decode_metar(raw_text)
+    elapsed = time.perf_counter() - start
+    print(f"\ndecode_metar: {len(reports) / elapsed:,.0f} reports/s ({elapsed / len(reports) * 1e6:.1f} us each)")
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import logging
+import time
+from collections import Counter, deque
+
+from constants import (
+    METAR_DEFAULT_ISSUE_MINUTE,
+    METAR_DENSE_INTERVAL,
+    METAR_DENSE_WINDOW,
+    METAR_PUBLISH_LAG,
+    METAR_REFRESH_INTERVAL,
+)
+from metar_data import FETCH_STATIONS
+
+logger = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+
+
+class RefreshScheduler:
+    """Decides when to fetch next from when each station usually reports.
+
+    Routine METARs come out at about the same minute every hour, so each
+    station's recent observation minutes are kept and the most common one is
+    taken as its issue minute (off-schedule SPECIs don't move it). Once a
+    station's report is due (issue minute plus `publish_lag` for the API to
+    have it) and not yet seen, polling is dense: every `dense_interval`,
+    doubling after each poll that brings nothing new, for up to `dense_window`.
+    Otherwise the next poll is the next station's due time, and at least every
+    `sparse_interval` to pick up SPECIs.
+    """
+
+    def __init__(self, stations=FETCH_STATIONS, dense_interval=METAR_DENSE_INTERVAL,
+                 sparse_interval=METAR_REFRESH_INTERVAL, dense_window=METAR_DENSE_WINDOW,
+                 publish_lag=METAR_PUBLISH_LAG, history=6):
+        self.stations = list(stations)
+        self.dense_interval = dense_interval
+        self.sparse_interval = sparse_interval
+        self.dense_window = dense_window
+        self.publish_lag = publish_lag
+
+        self._minutes = {code: deque(maxlen=history) for code in self.stations}
+        self._last_observed = {}
+        self._fruitless_polls = 0
+        self._observed = False
+
+    def observe(self, metar_infos):
+        """Learn from a successful fetch. Returns the number of new observations it held."""
+        new_observations = 0
+        for code in self.stations:
+            metar_info = metar_infos.get(code)
+            if metar_info is None or metar_info.observation_time is None:
+                continue
+            observed = metar_info.observation_time.timestamp()
+            last_observed = self._last_observed.get(code)
+            if last_observed is not None and observed <= last_observed:
+                continue
+            self._last_observed[code] = observed
+            self._minutes[code].append(int(observed % HOUR) // 60)
+            new_observations += 1
+
+        self._fruitless_polls = 0 if new_observations else self._fruitless_polls + 1
+        self._observed = True
+        return new_observations
+
+    def issue_minute(self, code):
+        """Minute past the hour this station usually reports at"""
+        minutes = self._minutes.get(code)
+        if not minutes:
+            return METAR_DEFAULT_ISSUE_MINUTE
+        return Counter(minutes).most_common(1)[0][0]
+
+    def _last_due_time(self, code, now):
+        """When the station's most recent report became available from the API"""
+        ready = now - now % HOUR + self.issue_minute(code) * 60 + self.publish_lag
+        return ready if ready <= now else ready - HOUR
+
+    def _has_report_for(self, code, due_time):
+        last_observed = self._last_observed.get(code)
+        if last_observed is None:
+            # A station missing from a whole fetch isn't reporting; the periodic
+            # full fetch picks it up if it comes back, so it is never due by itself
+            return self._observed
+        # Observations can be a few minutes off the usual minute; anything in the
+        # last half hour before the due time counts as that cycle's report
+        return last_observed >= due_time - self.publish_lag - HOUR / 2
+
+    def due_stations(self, now=None):
+        """Stations whose latest expected report has not been seen yet"""
+        if now is None:
+            now = time.time()
+        return [code for code in self.stations if not self._has_report_for(code, self._last_due_time(code, now))]
+
+    def next_delay(self, now=None):
+        """Seconds until the next fetch"""
+        if now is None:
+            now = time.time()
+
+        delay = self.sparse_interval
+        overdue = 0
+        for code in self.stations:
+            due_time = self._last_due_time(code, now)
+            if not self._has_report_for(code, due_time) and now - due_time < self.dense_window:
+                overdue += 1
+            delay = min(delay, due_time + HOUR - now)
+
+        if overdue:
+            delay = min(delay, self.dense_interval * 2 ** self._fruitless_polls)
+        delay = max(self.dense_interval, delay)
+        logger.debug(f"Next METAR fetch in {delay:.0f}s ({overdue} station(s) overdue)")
+        return delay
@@ -0,0 +1,28 @@
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metar_data import MetarInfos, get_metar_data
+from shared_weather import SHARED_WEATHER_MAX_AGE, SHARED_WEATHER_PATH, publish_weather, read_weather
+
+logger = logging.getLogger(__name__)
+
+
+def publish_metar_infos(version, metar_infos, path=SHARED_WEATHER_PATH):
+    """Publish a refresher snapshot to the shared store for the other services on this box"""
+    try:
+        publish_weather([metar_info.to_record() for metar_info in metar_infos.values()], version, path)
+    except OSError as e:
+        logger.warning(f"Could not publish shared weather: {e}")
+
+
+def get_shared_metar_data(path=SHARED_WEATHER_PATH, max_age=SHARED_WEATHER_MAX_AGE):
+    """The LED service's latest weather from the shared store, fetched directly only if there is none"""
+    version, records = read_weather(path, max_age)
+    if records is not None:
+        logger.info(f"Using shared weather v{version} for {len(records)} stations")
+        return MetarInfos.from_json(records)
+    logger.info("No shared weather from the LED service, fetching it directly")
+    return get_metar_data()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for airports.py
+Tests incremental LED updates when new weather data arrives
+"""
+
+import unittest
+import datetime
+
+from airports import AirportLED, update_airport_leds
+from metar_data import MetarInfo, MetarInfos
+
+
+def make_metar_info(airport_code, flight_category="VFR", gust=0, minute=54, latitude=40.77, longitude=-111.97):
+    """Build a MetarInfo with only the fields the LED loop reads"""
+    return MetarInfo(
+        airport_code, flight_category, "350", 10, gust, False, False,
+        20, 10, 10, 30.0, "", [], latitude, longitude,
+        datetime.datetime(2025, 8, 25, 0, minute, tzinfo=datetime.timezone.utc)
+    )
+
+
+class TestIncrementalUpdates(unittest.TestCase):
+    """Refreshing weather data should only touch stations that changed"""
+
+    def setUp(self):
+        self.strip = [None] * 3
+        self.codes = ["KSLC", "KOGD", "KPVU"]
+        metar_infos = MetarInfos()
+        for code in self.codes:
+            metar_infos[code] = make_metar_info(code)
+        self.airport_leds = [
+            AirportLED(self.strip, index, code, metar_infos.get(code))
+            for index, code in enumerate(self.codes)
+        ]
+
+    def test_unchanged_observations_are_skipped(self):
+        metar_infos = MetarInfos()
+        for code in self.codes:
+            metar_infos[code] = make_metar_info(code)
+
+        self.assertEqual(update_airport_leds(self.airport_leds, metar_infos), [])
+
+    def test_only_changed_station_is_updated(self):
+        slots = [led.brightness_slot for led in self.airport_leds]
+        metar_infos = MetarInfos()
+        for code in self.codes:
+            metar_infos[code] = make_metar_info(code)
+        metar_infos["KOGD"] = make_metar_info("KOGD", flight_category="IFR", minute=58)
+
+        self.assertEqual(update_airport_leds(self.airport_leds, metar_infos), [1])
+        self.assertEqual(self.airport_leds[1].metar_info.flightCategory, "IFR")
+        # Same position, so the shared brightness slots are kept
+        self.assertEqual([led.brightness_slot for led in self.airport_leds], slots)
+
+    def test_fade_phase_survives_refresh(self):
+        metar_infos = MetarInfos()
+        for code in self.codes:
+            metar_infos[code] = make_metar_info(code, gust=25)
+        update_airport_leds(self.airport_leds, metar_infos)
+
+        led = self.airport_leds[0]
+        led.brightness_slot = None  # Full brightness so every fade step is visible
+        colors = [led.get_color(1000.0 + step * 0.3) for step in range(5)]
+        self.assertTrue(led.should_fade)
+
+        metar_infos["KSLC"] = make_metar_info("KSLC", gust=30, minute=58)
+        self.assertEqual(update_airport_leds(self.airport_leds, metar_infos), [0])
+        led.brightness_slot = None
+        self.assertTrue(led.should_fade)
+        # The fade picks up exactly where the frame clock says it is
+        self.assertEqual([led.get_color(1000.0 + step * 0.3) for step in range(5)], colors)
+
+    def test_missing_station_goes_dark(self):
+        metar_infos = MetarInfos()
+        metar_infos["KSLC"] = make_metar_info("KSLC")
+        metar_infos["KPVU"] = make_metar_info("KPVU")
+
+        self.assertEqual(update_airport_leds(self.airport_leds, metar_infos), [1])
+        self.assertIsNone(self.airport_leds[1].metar_info)
+        self.assertEqual(self.airport_leds[1].get_color(), (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
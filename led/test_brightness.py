@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Unit tests for brightness_service.py
+Checks the daily curves against astral's sun times and the factors against the curves
+"""
+
+import unittest
+import datetime
+from unittest.mock import patch
+
+import astral
+from astral.sun import sun as AstralSun
+
+import brightness_service
+from brightness_service import MIN_BRIGHTNESS, MINUTES_PER_DAY, BrightnessService
+
+POSITIONS = [
+    (40.77, -111.97),   # KSLC
+    (42.36, -71.01),    # KBOS
+    (61.17, -150.0),    # PANC
+    (51.47, -0.45),     # EGLL
+    (-33.95, 151.18),   # YSSY
+    (21.32, -157.92),   # PHNL
+]
+
+
+class TestBrightnessService(unittest.TestCase):
+    """Brightness should follow each airport's sun, one minute at a time"""
+
+    day = datetime.date(2025, 8, 25)
+    day_start = datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.timezone.utc)
+
+    def minute_of(self, moment):
+        return int((moment - self.day_start).total_seconds() // 60)
+
+    def test_factors_come_from_the_curves(self):
+        service = BrightnessService(precision=6)
+        slots = [service.register(latitude, longitude) for latitude, longitude in POSITIONS]
+        for minute in (0, 437, 1200):
+            now = self.day_start + datetime.timedelta(minutes=minute)
+            service.refresh(now)
+            for slot in slots:
+                self.assertEqual(service.factors[slot], service.curve(slot, self.day)[minute], f"{slot} {minute}")
+
+    def test_daily_curve_follows_the_sun(self):
+        latitude, longitude = POSITIONS[0]  # KSLC, UTC-7:28 by longitude
+        service = BrightnessService(precision=6)
+        curve = service.curve(service.register(latitude, longitude), self.day)
+        self.assertEqual(len(curve), MINUTES_PER_DAY)
+
+        # From 07:28 UTC on, the local date is the 25th
+        sun_times = AstralSun(astral.Observer(latitude, longitude), date=self.day, tzinfo=datetime.timezone.utc)
+        dawn, noon = sun_times["dawn"], sun_times["noon"]
+        self.assertAlmostEqual(curve[self.minute_of(dawn) - 10], MIN_BRIGHTNESS, places=6)
+        self.assertGreater(curve[self.minute_of(noon) + 1], 0.99)
+
+        # Ramping up from dawn to noon
+        minute = self.minute_of(dawn + (noon - dawn) / 2)
+        moment = self.day_start + datetime.timedelta(minutes=minute)
+        self.assertAlmostEqual(curve[minute], 1 - (noon - moment) / (noon - dawn), places=5)
+
+        # Before 07:28 UTC it is still the evening of the 24th: dimming towards dusk, then dark
+        self.assertGreater(curve[0], curve[60])
+        self.assertGreater(curve[60], MIN_BRIGHTNESS)
+        self.assertAlmostEqual(curve[4 * 60], MIN_BRIGHTNESS, places=6)
+
+    def test_curve_without_numpy_matches(self):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        service = BrightnessService(precision=6)
+        for latitude, longitude in POSITIONS:
+            service.register(latitude, longitude)
+        with patch.object(brightness_service, "np", None):
+            fallback = BrightnessService(precision=6)
+            for latitude, longitude in POSITIONS:
+                fallback.register(latitude, longitude)
+            expected = fallback._curve_for(today)
+        self.assertEqual(service._curve_for(today).tobytes(), expected.tobytes())
+
+    def test_next_day_is_built_ahead(self):
+        service = BrightnessService()
+        service.register(*POSITIONS[0])
+        evening = datetime.datetime(2025, 8, 25, 23, 30, tzinfo=datetime.timezone.utc)
+        service.refresh(evening - datetime.timedelta(hours=2))
+        self.assertIsNone(service._prebuild_thread)
+
+        service.refresh(evening)
+        service._prebuild_thread.join()
+        self.assertIn(evening.date() + datetime.timedelta(days=1), service._curves)
+        with patch.object(service, "_build_curve") as build_curve:
+            service.refresh(evening + datetime.timedelta(hours=1))
+            build_curve.assert_not_called()
+
+    def test_nearby_airports_share_a_slot(self):
+        service = BrightnessService(precision=1)
+        self.assertEqual(service.register(40.77, -111.97), service.register(40.79, -111.95))
+        self.assertNotEqual(service.register(40.77, -111.97), service.register(41.2, -112.01))
+
+    def test_version_increases_on_refresh(self):
+        service = BrightnessService()
+        service.register(40.77, -111.97)
+        # A fixed clock, mid-minute, so the test can't straddle a minute boundary
+        now = self.day_start.timestamp() + 12 * 60 * 60 + 30
+        service.refresh_if_due(now)
+        version = service.version
+        service.refresh_if_due(now + 20)
+        self.assertEqual(service.version, version)
+        service.refresh_if_due(now + 60)
+        self.assertEqual(service.version, version + 1)
+        service.refresh(datetime.datetime.fromtimestamp(now + 60, datetime.timezone.utc))
+        self.assertEqual(service.version, version + 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Unit tests for frame_engine.py
+Checks the whole-strip engine against the per-AirportLED path
+"""
+
+import unittest
+from unittest.mock import patch
+
+from airports import AirportLED
+from constants import IDLE_LOOP_DELAY, MAIN_LOOP_DELAY, STALE_DATA_AGE, STALE_LEVEL, get_strip
+from color_lut import LUT_COLORS, MAX_LEVEL, ColorLUT
+from frame_buffer import FrameBuffer
+from frame_clock import FrameClock, fade_phase, phase_offset_for
+from frame_engine import FrameEngine, np
+from frame_loop import FrameLoop
+from test_airports import make_metar_info
+from virtual_strip import VirtualStrip
+
+
+# Spread across longitudes so some airports are in daylight and some at night
+CASES = [
+    ("KSLC", "VFR", 0, -111.97),
+    ("KOGD", "MVFR", 25, -112.01),
+    ("KPVU", "IFR", 0, -60.0),
+    ("KBOS", "LIFR", 12, -10.0),
+    ("KJFK", "UNKNOWN", 30, 40.0),
+    ("KDEN", None, 0, 90.0),
+    ("KSEA", "VFR", 15, 140.0),
+    ("KSFO", "MVFR", 18, 175.0),
+]
+
+
+def make_leds():
+    leds = [
+        AirportLED([None] * len(CASES), index, code,
+                   make_metar_info(code, flight_category=category, gust=gust, longitude=longitude))
+        for index, (code, category, gust, longitude) in enumerate(CASES)
+    ]
+    # One airport with no weather data at all
+    leds.append(AirportLED([None] * len(CASES), len(CASES), "KXXX", None))
+    return leds
+
+
+def reference_frame(leds, now):
+    """What set_pixel_color() leaves in a NeoPixel buffer at time `now`"""
+    frame = []
+    for led in leds:
+        frame.extend(led.get_color(now))
+    return frame
+
+
+class TestFrameEngine(unittest.TestCase):
+    """The engine must be bit-identical to the per-object path"""
+
+    TIMES = [1000.0, 1000.05, 1000.7, 1001.33, 1001.999, 1002.0, 1002.4, 1003.9, 1004.01, 1009.5]
+
+    def check_engine(self, use_numpy):
+        reference_leds = make_leds()
+        engine = FrameEngine(make_leds(), use_numpy=use_numpy)
+
+        for now in self.TIMES:
+            expected = reference_frame(reference_leds, now)
+            self.assertEqual([int(value) for value in engine.render(now)], expected, f"frame at t={now}")
+
+    def check_spread_engine(self, use_numpy):
+        reference_leds = make_leds()
+        engine_leds = make_leds()
+        for leds in (reference_leds, engine_leds):
+            for led in leds:
+                led.phase_offset = phase_offset_for(led.airport_code, spread=3.0)
+        engine = FrameEngine(engine_leds, use_numpy=use_numpy)
+
+        for now in self.TIMES:
+            self.assertEqual([int(value) for value in engine.render(now)], reference_frame(reference_leds, now))
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_engine_with_phase_offsets(self):
+        self.check_spread_engine(use_numpy=True)
+
+    def test_array_engine_with_phase_offsets(self):
+        self.check_spread_engine(use_numpy=False)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_engine_matches_per_led_path(self):
+        self.check_engine(use_numpy=True)
+
+    def test_array_engine_matches_per_led_path(self):
+        self.check_engine(use_numpy=False)
+
+    def test_update_picks_up_new_observation(self):
+        engine = FrameEngine(make_leds(), use_numpy=False)
+        led = engine.airport_leds[0]
+        led.update_metar_info(make_metar_info("KSLC", flight_category="IFR", minute=58, longitude=CASES[0][3]))
+        engine.update([0])
+
+        reference_leds = make_leds()
+        reference_leds[0].update_metar_info(
+            make_metar_info("KSLC", flight_category="IFR", minute=58, longitude=CASES[0][3]))
+        self.assertEqual(list(engine.render(1000.0))[:3], reference_frame(reference_leds, 1000.0)[:3])
+
+
+class TestFrameClock(unittest.TestCase):
+    """Fades are a pure function of the frame clock"""
+
+    def test_clock_uses_time_source_once_per_tick(self):
+        samples = iter([10.0, 10.1, 10.2])
+        clock = FrameClock(time_source=lambda: next(samples))
+        self.assertEqual(clock.tick(), 10.1)
+        self.assertEqual(clock.tick(), 10.2)
+        self.assertEqual(clock.tick(55.0), 55.0)
+        self.assertEqual(clock.frame, 3)
+
+    def test_fade_phase_cycle(self):
+        self.assertEqual(fade_phase(0.0, duration=2.0), (0.0, 1))
+        self.assertEqual(fade_phase(1.0, duration=2.0), (0.5, 1))
+        self.assertEqual(fade_phase(2.0, duration=2.0), (0.0, -1))
+        self.assertEqual(fade_phase(3.0, duration=2.0), (0.5, -1))
+        self.assertEqual(fade_phase(4.0, duration=2.0), (0.0, 1))
+        self.assertEqual(fade_phase(3.0, phase_offset=1.0, duration=2.0), (0.0, 1))
+
+    def test_phase_offsets_are_stable(self):
+        self.assertEqual(phase_offset_for("KSLC", spread=0), 0.0)
+        offset = phase_offset_for("KSLC", spread=4.0)
+        self.assertEqual(offset, phase_offset_for("KSLC", spread=4.0))
+        self.assertTrue(0 <= offset < 4.0)
+        self.assertNotEqual(offset, phase_offset_for("KOGD", spread=4.0))
+
+
+class TestColorLUT(unittest.TestCase):
+    """Precomputed colors should match direct integer scaling"""
+
+    def test_linear_lut(self):
+        lut = ColorLUT()
+        for color_index, color in enumerate(LUT_COLORS):
+            self.assertEqual(lut.color(color_index, MAX_LEVEL), color)
+            self.assertEqual(lut.color(color_index, 0), (0, 0, 0))
+            for level in (1, 3, 64, 128, 200):
+                self.assertEqual(lut.color(color_index, level), tuple(c * level // MAX_LEVEL for c in color))
+
+    def test_gamma_lut(self):
+        lut = ColorLUT(gamma=2.2)
+        linear = ColorLUT()
+        for color_index, color in enumerate(LUT_COLORS):
+            self.assertEqual(lut.color(color_index, MAX_LEVEL), color)
+            # Gamma correction darkens the mid levels
+            for channel, linear_channel in zip(lut.color(color_index, 128), linear.color(color_index, 128)):
+                self.assertLessEqual(channel, linear_channel)
+
+
+class CountingStrip(list):
+    """Minimal stand-in for a NeoPixel strip that counts show() calls"""
+
+    def __init__(self, count):
+        super().__init__([(0, 0, 0)] * count)
+        self.shows = 0
+
+    def show(self):
+        self.shows += 1
+
+
+class TestFrameLoop(unittest.TestCase):
+    """Unchanged frames should not be pushed to the strip"""
+
+    def make_loop(self, gusty, use_engine):
+        strip = CountingStrip(2)
+        leds = [
+            AirportLED(strip, 0, "KSLC", make_metar_info("KSLC", gust=25 if gusty else 0)),
+            AirportLED(strip, 1, "KOGD", make_metar_info("KOGD")),
+        ]
+        # Full brightness regardless of the time of day the tests run at
+        for led in leds:
+            led.brightness_slot = None
+        return strip, FrameLoop(strip, leds, use_engine=use_engine)
+
+    def test_static_map_is_shown_once(self):
+        for use_engine in (True, False):
+            strip, frame_loop = self.make_loop(gusty=False, use_engine=use_engine)
+            delays = [frame_loop.tick() for _ in range(5)]
+
+            self.assertEqual(strip.shows, 1)
+            self.assertEqual(frame_loop.frame_count, 5)
+            self.assertEqual(delays, [IDLE_LOOP_DELAY] * 5)
+
+    def test_fading_map_runs_at_full_rate(self):
+        strip, frame_loop = self.make_loop(gusty=True, use_engine=True)
+        delays = [frame_loop.tick(1000.0 + step * 0.25) for step in range(5)]
+
+        self.assertEqual(strip.shows, 5)
+        self.assertEqual(delays, [MAIN_LOOP_DELAY] * 5)
+
+    def test_brightness_checked_once_per_frame(self):
+        strip, frame_loop = self.make_loop(gusty=True, use_engine=False)
+        service = frame_loop.brightness_service
+        with patch.object(service, "refresh_if_due", wraps=service.refresh_if_due) as refresh_if_due:
+            for step in range(3):
+                frame_loop.tick(1000.0 + step * 0.25)
+        self.assertEqual([call.args for call in refresh_if_due.call_args_list], [(1000.0,), (1000.25,), (1000.5,)])
+
+    def test_stale_data_is_dimmed(self):
+        strip, frame_loop = self.make_loop(gusty=False, use_engine=True)
+        observed = frame_loop.airport_leds[0].metar_info.observation_time.timestamp()
+        fresh = frame_loop.airport_leds[0].get_color(observed)
+
+        frame_loop.tick(observed + 60)
+        self.assertEqual(strip[0], fresh)
+        frame_loop.tick(observed + STALE_DATA_AGE + 60)
+        self.assertEqual(strip[0], tuple(channel * STALE_LEVEL // MAX_LEVEL for channel in fresh))
+        self.assertTrue(all(led.stale for led in frame_loop.airport_leds))
+
+    def test_new_weather_is_shown(self):
+        strip, frame_loop = self.make_loop(gusty=False, use_engine=True)
+        frame_loop.tick()
+        metar_infos = {"KSLC": make_metar_info("KSLC", flight_category="IFR", minute=58),
+                       "KOGD": make_metar_info("KOGD")}
+        self.assertEqual(frame_loop.update(metar_infos), [0])
+        frame_loop.tick()
+
+        self.assertEqual(strip.shows, 2)
+
+
+try:
+    import adafruit_pixelbuf
+except ImportError:
+    adafruit_pixelbuf = None
+
+
+@unittest.skipIf(adafruit_pixelbuf is None, "adafruit_pixelbuf not installed")
+class TestFrameBuffer(unittest.TestCase):
+    """Bulk copies must leave the driver buffer exactly as per-pixel writes would"""
+
+    def make_strip(self, count):
+        class Strip(adafruit_pixelbuf.PixelBuf):
+            def _transmit(self, buffer):
+                pass
+
+        return Strip(count, byteorder="GRB", auto_write=False)
+
+    def check_frame(self, frame):
+        count = len(frame) // 3
+        expected = self.make_strip(count)
+        for index in range(count):
+            expected[index] = tuple(int(channel) for channel in frame[index * 3:index * 3 + 3])
+
+        strip = self.make_strip(count)
+        frame_buffer = FrameBuffer(strip, count)
+        self.assertTrue(frame_buffer.bulk)
+        frame_buffer.load(frame)
+        frame_buffer.push(frame)
+        self.assertEqual(strip._post_brightness_buffer, expected._post_brightness_buffer)
+
+    def test_array_frame(self):
+        engine = FrameEngine(make_leds(), use_numpy=False)
+        self.check_frame(engine.render(1000.7))
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_frame(self):
+        engine = FrameEngine(make_leds(), use_numpy=True)
+        self.check_frame(engine.render(1000.7))
+
+
+class TestVirtualStrip(unittest.TestCase):
+    """The headless strip should take the bulk path and read back like a NeoPixel"""
+
+    def test_get_strip_selects_virtual_backend(self):
+        strip = get_strip("virtual", count=4)
+        self.assertIsInstance(strip, VirtualStrip)
+        self.assertEqual(len(strip), 4)
+        with self.assertRaises(ValueError):
+            get_strip("nonexistent")
+
+    def test_frame_loop_output_matches_per_led_colors(self):
+        leds = make_leds()
+        strip = VirtualStrip(len(leds))
+        frame_loop = FrameLoop(strip, leds, use_engine=True)
+        self.assertTrue(frame_loop.frame_buffer.bulk)
+
+        for step in range(3):
+            now = 1000.0 + step * 0.3
+            frame_loop.tick(now)
+            self.assertEqual([strip[index] for index in range(len(leds))],
+                             [led.get_color(now) for led in leds])
+
+        self.assertEqual(strip.show_count, frame_loop.show_count)
+        self.assertEqual(len(strip.frames), strip.show_count)
+        self.assertEqual(strip.frames[-1], bytes(strip._post_brightness_buffer))
+        self.assertLessEqual(strip.shortest_show_interval, strip.longest_show_interval)
+
+    def test_long_runs_stay_bounded(self):
+        strip = VirtualStrip(4, max_frames=2)
+        for _ in range(1000):
+            strip.show()
+        self.assertEqual(strip.show_count, 1000)
+        self.assertEqual(len(strip.frames), 2)
+        self.assertGreaterEqual(strip.last_show_time, strip.first_show_time)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for metar_cache.py
+Checks stale-while-revalidate serving, backoff and the circuit breaker
+"""
+
+import unittest
+
+from metar_cache import MetarCache
+from metar_data import MetarInfos
+from metar_refresher import MetarRefresher
+from test_airports import make_metar_info
+
+
+def make_infos(*codes, minute=54):
+    metar_infos = MetarInfos()
+    for code in codes:
+        metar_infos[code] = make_metar_info(code, minute=minute)
+    return metar_infos
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetarCache(unittest.TestCase):
+    """Fetch failures should be absorbed while the last good data keeps being served"""
+
+    def make_cache(self, results):
+        self.calls = 0
+
+        def fetch():
+            self.calls += 1
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        self.clock = FakeClock()
+        return MetarCache(fetch, retry_delay=10, max_retry_delay=60, breaker_threshold=3,
+                          breaker_cooldown=600, clock=self.clock)
+
+    def test_failures_serve_cached_data_with_backoff(self):
+        first = make_infos("KSLC", "KOGD")
+        cache = self.make_cache([first, OSError("down"), OSError("down")])
+
+        served = cache.refresh()
+        self.assertEqual(sorted(served), ["KOGD", "KSLC"])
+        self.assertEqual(cache.next_delay(300), 300)
+
+        self.assertIs(cache.refresh(), served)
+        self.assertEqual(cache.next_delay(300), 10)
+        self.assertIs(cache.refresh(), served)
+        self.assertEqual(cache.next_delay(300), 20)
+
+    def test_breaker_stops_calling_the_api(self):
+        recovered = make_infos("KSLC", minute=58)
+        cache = self.make_cache([OSError("down")] * 3 + [recovered])
+        for _ in range(3):
+            self.assertIsNone(cache.refresh())
+        self.assertTrue(cache.breaker_open)
+        self.assertEqual(cache.next_delay(300), 600)
+
+        cache.refresh()
+        self.assertEqual(self.calls, 3)
+
+        self.clock.now = 601
+        self.assertEqual(list(cache.refresh()), ["KSLC"])
+        self.assertEqual(self.calls, 4)
+        self.assertEqual(cache.failures, 0)
+        self.assertEqual(cache.next_delay(300), 300)
+
+    def test_missing_stations_keep_last_observation(self):
+        first = make_infos("KSLC", "KOGD")
+        cache = self.make_cache([first, make_infos("KSLC", minute=58)])
+        cache.refresh()
+        served = cache.refresh()
+
+        self.assertEqual(served["KSLC"].observation_time.minute, 58)
+        self.assertIs(served["KOGD"], first["KOGD"])
+        observed = served["KOGD"].observation_time.timestamp()
+        self.assertEqual(cache.age("KOGD", now=observed + 90), 90)
+        self.assertIsNone(cache.age("KXXX"))
+
+    def test_older_observations_are_ignored(self):
+        # A partial fetch brings KSLC's new report; the next full fetch's KSLC chunk
+        # failed, so the fetcher hands back that chunk's older data
+        newer = make_infos("KSLC", minute=58)
+        newer["KSLC"].flightCategory = "IFR"
+        older = make_infos("KSLC", "KOGD")
+        cache = self.make_cache([make_infos("KSLC", "KOGD"), newer, older])
+        cache.refresh()
+        cache.refresh()
+        served = cache.refresh()
+
+        self.assertIs(served["KSLC"], newer["KSLC"])
+        self.assertEqual(served["KSLC"].flightCategory, "IFR")
+
+    def test_refresher_does_not_publish_failures(self):
+        first = make_infos("KSLC")
+        refresher = MetarRefresher(cache=self.make_cache([OSError("down"), first, OSError("down")]))
+        self.assertEqual([refresher.refresh() for _ in range(3)], [0, 1, 1])
+        self.assertEqual(list(refresher.snapshot[1]), ["KSLC"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for metar_decoder.py
+Decodes sample raw reports and checks the fields reach MetarInfo and the LEDs
+"""
+
+import unittest
+
+from airports import AirportLED
+from frame_engine import FrameEngine
+from metar_data import MetarInfos
+from metar_decoder import decode_metar
+
+
+class TestMetarDecoder(unittest.TestCase):
+    """Raw report groups should be picked out of the text in one pass"""
+
+    def test_routine_report(self):
+        decoded = decode_metar("KSLC 250054Z 35010KT 10SM FEW080 SCT140 BKN250 30/11 A3004 RMK AO2 SLP136")
+        self.assertEqual((decoded.wind_dir, decoded.wind_speed, decoded.wind_gust), (350, 10, None))
+        self.assertEqual(decoded.weather, [])
+        self.assertFalse(decoded.lightning)
+        self.assertEqual(decoded.remarks, "AO2 SLP136")
+
+    def test_thunderstorm_with_gusts(self):
+        decoded = decode_metar(
+            "KDEN 251953Z 27025G38KT 10SM -TSRA VCSH FEW080CB BKN120 28/09 A3012 "
+            "RMK AO2 PK WND 27045/1932 TSB35 OCNL LTGICCG OHD")
+        self.assertEqual((decoded.wind_dir, decoded.wind_speed, decoded.wind_gust), (270, 25, 38))
+        self.assertEqual(decoded.weather, ["-TSRA", "VCSH"])
+        self.assertTrue(decoded.thunderstorm)
+        self.assertTrue(decoded.lightning)
+
+    def test_rvr_metric_wind_and_remark_lightning(self):
+        decoded = decode_metar("KJFK 251951Z 04005KT 1/2SM R04R/2000V4000FT/D +RA BR OVC004 21/20 A2990 RMK AO2 TSNO")
+        self.assertEqual(decoded.rvr, [("04R", "2000V4000")])
+        self.assertEqual(decoded.weather, ["+RA", "BR"])
+        self.assertFalse(decoded.lightning)
+
+        decoded = decode_metar("EGLL 251950Z VRB03MPS 9999 SCT020 18/12 Q1012 NOSIG")
+        self.assertEqual((decoded.wind_dir, decoded.wind_speed), ("VRB", 6))
+
+        decoded = decode_metar("KXXX 251950Z AUTO 18012G22KT 10SM CLR 20/10 A3000 RMK AO2 LTG DSNT W")
+        self.assertFalse(decoded.thunderstorm)
+        self.assertTrue(decoded.lightning)
+
+    def test_weather_groups_need_a_phenomenon(self):
+        decoded = decode_metar("KSLC 250054Z 35010KT 10SM VC BC -SHRA FEW080 30/11 A3004")
+        self.assertEqual(decoded.weather, ["-SHRA"])
+
+        # Station IDs made of weather letters are not weather
+        decoded = decode_metar("METAR RASN 250054Z 35010KT 10SM FEW080 30/11 A3004")
+        self.assertEqual(decoded.weather, [])
+        decoded = decode_metar("SNRA 250054Z 35010KT 2SM -SN BKN010 M01/M03 A2990")
+        self.assertEqual(decoded.weather, ["-SN"])
+
+    def test_thunderstorm_in_the_vicinity(self):
+        decoded = decode_metar("KDEN 251953Z 27008KT 10SM VCTS FEW080CB 28/09 A3012 RMK AO2")
+        self.assertEqual(decoded.weather, ["VCTS"])
+        self.assertFalse(decoded.thunderstorm)
+        self.assertFalse(decoded.lightning)
+
+        # Lightning seen from the station is still reported in the remarks
+        decoded = decode_metar("KDEN 251953Z 27008KT 10SM VCTS FEW080CB 28/09 A3012 RMK AO2 LTG DSNT W")
+        self.assertFalse(decoded.thunderstorm)
+        self.assertTrue(decoded.lightning)
+
+    def test_lightning_reaches_the_leds(self):
+        record = {"icaoId": "KDEN", "fltCat": "VFR", "obsTime": 1756151580, "wgst": None, "lat": 39.86, "lon": -104.67,
+                  "rawOb": "KDEN 251953Z 27008KT 10SM TS FEW080CB 28/09 A3012 RMK AO2 LTG DSNT ALQDS"}
+        metar_info = MetarInfos.from_json([record])["KDEN"]
+        self.assertTrue(metar_info.lightning)
+        self.assertEqual(metar_info.raw_text, record["rawOb"])
+
+        led = AirportLED([None], 0, "KDEN", metar_info)
+        led.brightness_slot = None
+        self.assertNotEqual(led.get_color(1000.0), led.get_color(1001.0))
+        self.assertTrue(FrameEngine([led]).animating)
+
+    def test_raw_gust_fills_in_missing_gust(self):
+        record = {"icaoId": "KOGD", "fltCat": "VFR", "obsTime": 1756151580, "wgst": None,
+                  "rawOb": "KOGD 251953Z 18015G27KT 10SM CLR 20/10 A3000"}
+        metar_info = MetarInfos.from_json([record])["KOGD"]
+        self.assertEqual(metar_info.windGustSpeed, 27)
+        self.assertTrue(metar_info.windGust)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
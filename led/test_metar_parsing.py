@@ -7,9 +7,70 @@ Tests both XML and JSON API responses to ensure equivalent MetarInfo objects
 import unittest
 from unittest.mock import patch, Mock
 import datetime
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import requests
 
 # Import the actual metar_data module
-from metar_data import MetarInfos
+from constants import METAR_CSV_TIME_BUDGET
+from metar_data import MetarCsvSource, MetarFetcher, MetarInfo, MetarInfos, load_metar_csv
+from metar_refresher import MetarRefresher
+from parse_benchmark import write_synthetic_csv
+
+# Header of the bulk metars.cache.csv file, with its repeated cloud layer columns
+CSV_HEADER = (
+    "raw_text,station_id,observation_time,latitude,longitude,temp_c,dewpoint_c,wind_dir_degrees,"
+    "wind_speed_kt,wind_gust_kt,visibility_statute_mi,altim_in_hg,sea_level_pressure_mb,corrected,auto,"
+    "auto_station,maintenance_indicator_on,no_signal,lightning_sensor_off,freezing_rain_sensor_off,"
+    "present_weather_sensor_off,wx_string,sky_cover,cloud_base_ft_agl,sky_cover,cloud_base_ft_agl,"
+    "sky_cover,cloud_base_ft_agl,sky_cover,cloud_base_ft_agl,flight_category,three_hr_pressure_tendency_mb,"
+    "maxT_c,minT_c,maxT24hr_c,minT24hr_c,precip_in,pcp3hr_in,pcp6hr_in,pcp24hr_in,snow_in,vert_vis_ft,"
+    "metar_type,elevation_m"
+)
+
+# API records with the flight category the API assigned them, covering each category boundary
+FLIGHT_CATEGORY_CORPUS = [
+    {"visib": "10+", "clouds": [{"cover": "FEW", "base": 8000}, {"cover": "BKN", "base": 25000}], "fltCat": "VFR"},
+    {"visib": "10+", "clouds": [{"cover": "CLR"}], "fltCat": "VFR"},
+    {"visib": 6, "clouds": [{"cover": "BKN", "base": 3100}], "fltCat": "VFR"},
+    {"visib": 10, "clouds": [{"cover": "FEW", "base": 400}, {"cover": "SCT", "base": 900}], "fltCat": "VFR"},
+    {"visib": 5, "clouds": [{"cover": "SCT", "base": 5000}], "fltCat": "MVFR"},
+    {"visib": "10+", "clouds": [{"cover": "BKN", "base": 3000}], "fltCat": "MVFR"},
+    {"visib": "10+", "clouds": [{"cover": "SCT", "base": 800}, {"cover": "OVC", "base": 1000}], "fltCat": "MVFR"},
+    {"visib": 3, "clouds": [], "fltCat": "MVFR"},
+    {"visib": 2.5, "clouds": [{"cover": "OVC", "base": 1500}], "fltCat": "IFR"},
+    {"visib": "1 1/2", "clouds": [{"cover": "SCT", "base": 2000}], "fltCat": "IFR"},
+    {"visib": "10+", "clouds": [{"cover": "OVC", "base": 2000}, {"cover": "BKN", "base": 900}], "fltCat": "IFR"},
+    {"visib": 1, "clouds": [{"cover": "BKN", "base": 500}], "fltCat": "IFR"},
+    {"visib": 0.75, "clouds": [{"cover": "FEW", "base": 1000}], "fltCat": "LIFR"},
+    {"visib": "10+", "clouds": [{"cover": "OVC", "base": 400}], "fltCat": "LIFR"},
+    {"visib": 0.25, "clouds": [{"cover": "OVX", "base": 0}], "fltCat": "LIFR"},
+]
+
+
+def csv_row(station_id, flight_category="VFR", sky=(("FEW", 8000), ("SCT", 14000), ("BKN", 25000))):
+    columns = dict.fromkeys(CSV_HEADER.split(","), "")
+    columns.update({
+        "raw_text": f"{station_id} 250054Z 35010KT 10SM FEW080 SCT140 BKN250 30/11 A3004",
+        "station_id": station_id, "observation_time": "2025-08-25T00:54:00Z",
+        "latitude": "40.77", "longitude": "-111.97", "temp_c": "30.0", "dewpoint_c": "10.6",
+        "wind_dir_degrees": "350", "wind_speed_kt": "10", "visibility_statute_mi": "10+",
+        "altim_in_hg": "30.04", "flight_category": flight_category, "metar_type": "METAR",
+    })
+    values = [columns[name] for name in CSV_HEADER.split(",")]
+    sky_start = CSV_HEADER.split(",").index("sky_cover")
+    for layer, (cover, base) in enumerate(sky):
+        values[sky_start + layer * 2:sky_start + layer * 2 + 2] = [cover, str(base)]
+    return ",".join(values)
+
 
 class TestMetarDataParsing(unittest.TestCase):
     """Test metar_data.py parsing with mock API responses"""
@@ -140,6 +201,110 @@ class TestMetarDataParsing(unittest.TestCase):
             self.assertEqual(kslc.skyConditions[i]['cover'], expected_cloud['cover'])
             self.assertEqual(kslc.skyConditions[i]['cloudBaseFt'], expected_cloud['cloudBaseFt'])
     
+    def test_xml_streams_from_files(self):
+        """Paths and file objects parse the same as an in-memory document"""
+        missing_category = self.mock_xml_response.replace(
+            "</data>", "<METAR><station_id>KOGD</station_id></METAR></data>")
+        expected = MetarInfos.from_xml(missing_category)
+        self.assertEqual(list(expected), ['KSLC'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metars.xml")
+            with open(path, "w") as f:
+                f.write(missing_category)
+            with open(path, "rb") as f:
+                results = [MetarInfos.from_xml(path), MetarInfos.from_xml(f)]
+
+        for result in results:
+            self.assertEqual(list(result), ['KSLC'])
+            for field in MetarInfo.__slots__:
+                self.assertEqual(getattr(result['KSLC'], field), getattr(expected['KSLC'], field), field)
+
+    def test_xml_drops_parsed_metars(self):
+        """Each parsed METAR is detached from <data>, so a large document is never held whole"""
+        metar = self.mock_xml_response[self.mock_xml_response.index("<METAR>"):self.mock_xml_response.index("</METAR>") + 8]
+        document = self.mock_xml_response.replace(
+            metar, "".join(metar.replace("KSLC", f"K{index:03d}") for index in range(50)))
+
+        elements = []
+        iterparse = ET.iterparse
+
+        def recording_iterparse(source, events=None):
+            for event, element in iterparse(source, events):
+                elements.append(element)
+                yield event, element
+
+        with patch("metar_data.ET.iterparse", recording_iterparse):
+            result = MetarInfos.from_xml(document)
+
+        self.assertEqual(len(result), 50)
+        data = next(element for element in elements if element.tag == "data")
+        self.assertEqual(len(data), 0)
+
+    def test_csv_bulk_file(self):
+        """Gzipped bulk CSV rows parse like the XML for the same METAR, filtered to our stations"""
+        expected = MetarInfos.from_xml(self.mock_xml_response)['KSLC']
+        lines = ["No errors", "No warnings", "12 ms", "data source=metars", "3 results", CSV_HEADER,
+                 csv_row("KSLC"), csv_row("EGLL", "IFR"), csv_row("KOGD", "")]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metars.cache.csv.gz")
+            with gzip.open(path, "wt") as f:
+                f.write("\n".join(lines) + "\n")
+            result = load_metar_csv(path, stations=["KSLC", "KOGD"])
+
+        self.assertEqual(list(result), ['KSLC'])
+        for field in MetarInfo.__slots__:
+            if field != "visibility":
+                self.assertEqual(getattr(result['KSLC'], field), getattr(expected, field), field)
+        # Reported visibility keeps each source's own form
+        self.assertEqual(result['KSLC'].visibility, "10+")
+
+    def test_json_keeps_latest_record_of_wanted_stations(self):
+        """Older records and stations outside the filter are dropped; other fields convert on access"""
+        latest = dict(self.mock_json_response[0], fltCat="VFR")
+        older = dict(latest, obsTime=latest["obsTime"] - 3600, fltCat="IFR")
+        other = dict(latest, icaoId="KOGD")
+        result = MetarInfos.from_json([older, latest, other], stations={"KSLC"})
+
+        self.assertEqual(list(result), ["KSLC"])
+        kslc = result['KSLC']
+        self.assertEqual(kslc.flightCategory, 'VFR')
+        # Cloud layers are kept compactly rather than as the record's list of dicts
+        self.assertIsInstance(kslc._clouds, tuple)
+        self.assertEqual(kslc.observation_time, self.expected_obs_time)
+        self.assertEqual(kslc.skyConditions, self.expected_sky_conditions)
+        self.assertEqual(kslc.dewpointC, self.expected_dewpoint_c)
+        self.assertEqual(round(kslc.altimHg, 2), self.expected_altim_hg)
+        with self.assertRaises(AttributeError):
+            kslc.not_a_field
+
+    def test_fields_read_from_two_threads(self):
+        """The refresher and render threads can read the same fresh MetarInfos at once"""
+        records = [dict(self.mock_json_response[0], icaoId=f"K{index:03d}") for index in range(20)]
+        expected = [metar_info.to_record() for metar_info in MetarInfos.from_json(records).values()]
+
+        def to_records(metar_infos, barrier, results):
+            barrier.wait()
+            results.append([metar_info.to_record() for metar_info in metar_infos.values()])
+
+        previous_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _trial in range(50):
+                metar_infos = MetarInfos.from_json(records)
+                barrier = threading.Barrier(2)
+                results = []
+                threads = [threading.Thread(target=to_records, args=(metar_infos, barrier, results)) for _ in range(2)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(results, [expected, expected])
+                self.assertEqual([metar_info.to_record() for metar_info in metar_infos.values()], expected)
+        finally:
+            sys.setswitchinterval(previous_interval)
+
     def test_flight_category_calculation(self):
         """Test flight category calculation logic"""
         # Test the _calculate_flight_category method for various scenarios
@@ -147,7 +312,180 @@ class TestMetarDataParsing(unittest.TestCase):
         # MVFR: vis 3-5, ceiling 1000-3000  
         # IFR: vis 1-3, ceiling 500-1000
         # LIFR: vis < 1, ceiling < 500
-        pass
+        derived = MetarInfos._calculate_flight_categories(FLIGHT_CATEGORY_CORPUS)
+        for record, category in zip(FLIGHT_CATEGORY_CORPUS, derived):
+            self.assertEqual(category, record["fltCat"], record)
+
+        # Stations without fltCat get a derived category instead of a dark LED
+        records = [dict(record, icaoId=f"K{index:03d}", fltCat=None) for index, record in enumerate(FLIGHT_CATEGORY_CORPUS)]
+        records.append({"icaoId": "KNOD", "obsTime": 1756083240})
+        result = MetarInfos.from_json(records)
+        self.assertNotIn("KNOD", result)
+        self.assertEqual([result[record["icaoId"]].flightCategory for record in records[:-1]],
+                         [record["fltCat"] for record in FLIGHT_CATEGORY_CORPUS])
+
+
+def make_response(status_code, records=None, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = json.dumps(records).encode() if records is not None else b""
+    response.json.side_effect = lambda: json.loads(response.content)
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestConditionalFetch(unittest.TestCase):
+    """Unchanged data should come back as the same MetarInfos without re-parsing"""
+
+    records = [{"icaoId": "KSLC", "fltCat": "VFR", "obsTime": 1756083240, "lat": 40.77, "lon": -111.97}]
+
+    def make_fetcher(self, *responses):
+        session = Mock()
+        session.headers = {}
+        session.get.side_effect = list(responses)
+        return MetarFetcher(stations=["KSLC"], session=session), session
+
+    def test_not_modified_returns_previous_data(self):
+        fetcher, session = self.make_fetcher(
+            make_response(200, self.records, {"ETag": '"abc"', "Last-Modified": "Mon, 25 Aug 2025 01:00:00 GMT"}),
+            make_response(304),
+        )
+        first = fetcher.fetch()
+        with patch.object(MetarInfos, "from_json") as from_json:
+            self.assertIs(fetcher.fetch(), first)
+            from_json.assert_not_called()
+
+        self.assertEqual(session.headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(session.get.call_args_list[0].kwargs["headers"], {})
+        self.assertEqual(session.get.call_args_list[1].kwargs["headers"], {
+            "If-None-Match": '"abc"', "If-Modified-Since": "Mon, 25 Aug 2025 01:00:00 GMT"})
+
+    def test_identical_body_skips_parsing(self):
+        changed = [dict(self.records[0], fltCat="IFR")]
+        fetcher, _ = self.make_fetcher(
+            make_response(200, self.records), make_response(200, self.records), make_response(200, changed))
+        first = fetcher.fetch()
+        self.assertIs(fetcher.fetch(), first)
+
+        third = fetcher.fetch()
+        self.assertIsNot(third, first)
+        self.assertEqual(third["KSLC"].flightCategory, "IFR")
+
+    def test_failed_chunk_only_degrades_its_own_stations(self):
+        stations = ["KSLC", "KOGD", "KPVU"]
+        failing = set()
+        versions = {code: 1756083240 for code in stations}
+
+        def get(url, headers, timeout):
+            code = url.split("ids=")[1].split("&")[0]
+            if code in failing:
+                raise requests.ConnectionError(f"{code} timed out")
+            return make_response(200, [{"icaoId": code, "fltCat": "VFR", "obsTime": versions[code]}])
+
+        session = Mock()
+        session.headers = {}
+        session.get.side_effect = get
+        fetcher = MetarFetcher(stations=stations, session=session, chunk_size=1, workers=3)
+        self.assertEqual(len(fetcher.chunks), 3)
+
+        failing.add("KOGD")
+        self.assertEqual(sorted(fetcher.fetch()), ["KPVU", "KSLC"])
+
+        # KOGD comes back; then while it fails again its last good data is kept
+        failing.clear()
+        self.assertEqual(sorted(fetcher.fetch()), sorted(stations))
+        failing.add("KOGD")
+        versions["KSLC"] += 3600
+        metar_infos = fetcher.fetch()
+        self.assertEqual(sorted(metar_infos), sorted(stations))
+        self.assertEqual(metar_infos["KSLC"].observation_time.timestamp(), versions["KSLC"])
+
+        failing.update(stations)
+        with self.assertRaises(requests.ConnectionError):
+            fetcher.fetch()
+
+    def test_partial_fetch_requests_only_given_stations(self):
+        session = Mock()
+        session.headers = {}
+        session.get.return_value = make_response(200, self.records)
+        fetcher = MetarFetcher(stations=["KSLC", "KOGD", "KPVU"], session=session, chunk_size=2)
+
+        self.assertEqual(list(fetcher.fetch(["KSLC"])), ["KSLC"])
+        self.assertIn("ids=KSLC&", session.get.call_args.args[0])
+        # Partial results don't stand in for the full data set
+        self.assertIsNone(fetcher.metar_infos)
+
+    def test_refresher_keeps_version_for_unchanged_data(self):
+        metar_infos = MetarInfos()
+        results = [metar_infos, metar_infos, MetarInfos()]
+        refresher = MetarRefresher(fetch=lambda: results.pop(0))
+
+        self.assertEqual([refresher.refresh() for _ in range(3)], [1, 1, 2])
+
+
+
+class TestCsvSource(unittest.TestCase):
+    """The bulk file is always loaded whole, and only when it changed"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "metars.cache.csv.gz")
+        self.write(csv_row("KSLC"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, *rows):
+        with gzip.open(self.path, "wt") as f:
+            f.write("\n".join(["No errors", CSV_HEADER, *rows]) + "\n")
+
+    def test_unchanged_file_is_not_reparsed(self):
+        source = MetarCsvSource(self.path, stations=["KSLC", "KOGD"])
+        first = source.fetch(["KOGD"])
+        self.assertEqual(list(first), ["KSLC"])
+        with patch.object(MetarInfos, "from_csv") as from_csv:
+            self.assertIs(source.fetch(), first)
+            from_csv.assert_not_called()
+
+        self.write(csv_row("KSLC"), csv_row("KOGD", "IFR"))
+        self.assertEqual(sorted(source.fetch()), ["KOGD", "KSLC"])
+
+    def test_mirror_is_requested_conditionally(self):
+        with open(self.path, "rb") as f:
+            body = f.read()
+        response = Mock(status_code=200, headers={"ETag": '"abc"'}, raw=io.BytesIO(body))
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=False)
+        not_modified = Mock(status_code=304)
+        not_modified.__enter__ = Mock(return_value=not_modified)
+        not_modified.__exit__ = Mock(return_value=False)
+        session = Mock()
+        session.get.side_effect = [response, not_modified]
+
+        source = MetarCsvSource("https://mirror.example/metars.cache.csv.gz", stations=["KSLC"], session=session)
+        first = source.fetch()
+        self.assertEqual(list(first), ["KSLC"])
+        self.assertIs(source.fetch(), first)
+        self.assertEqual(session.get.call_args_list[0].kwargs["headers"], {})
+        self.assertEqual(session.get.call_args_list[1].kwargs["headers"], {"If-None-Match": '"abc"'})
+
+    def test_worldwide_file_loads_within_budget(self):
+        write_synthetic_csv(self.path, 10000)
+        start = time.monotonic()
+        metar_infos = load_metar_csv(self.path)
+        self.assertLess(time.monotonic() - start, METAR_CSV_TIME_BUDGET)
+        self.assertGreater(len(metar_infos), 0)
+
+    def test_refresher_only_asks_for_full_loads(self):
+        requested = []
+        metar_infos = MetarInfos()
+        refresher = MetarRefresher(fetch=lambda stations=None: requested.append(stations) or metar_infos,
+                                   full_fetches_only=True)
+        refresher.scheduler.due_stations = lambda now=None: ["KSLC"]
+        refresher.refresh()
+        refresher.refresh()
+        self.assertEqual(requested, [None, None])
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
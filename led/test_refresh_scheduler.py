@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for refresh_scheduler.py
+Checks learned report minutes and dense/sparse poll timing
+"""
+
+import datetime
+import unittest
+
+from metar_cache import MetarCache
+from metar_data import MetarInfos
+from metar_refresher import MetarRefresher
+from refresh_scheduler import RefreshScheduler
+from test_airports import make_metar_info
+
+HOUR_START = datetime.datetime(2025, 8, 25, 12, 0, tzinfo=datetime.timezone.utc).timestamp()
+
+
+def observations(**minutes):
+    """MetarInfos with each station observed at the given minute past HOUR_START (may exceed 59)"""
+    metar_infos = MetarInfos()
+    for code, minute in minutes.items():
+        metar_info = make_metar_info(code)
+        metar_info.observation_time = datetime.datetime.fromtimestamp(HOUR_START + minute * 60, tz=datetime.timezone.utc)
+        metar_infos[code] = metar_info
+    return metar_infos
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    """Polls should bunch up after expected report times and thin out otherwise"""
+
+    def make_scheduler(self):
+        return RefreshScheduler(stations=["KSLC", "KOGD"], dense_interval=60, sparse_interval=600,
+                                dense_window=600, publish_lag=180)
+
+    def test_learns_issue_minute_despite_specials(self):
+        scheduler = self.make_scheduler()
+        self.assertEqual(scheduler.issue_minute("KSLC"), 53)
+
+        for hour, minute in enumerate([54, 54, 17, 54]):
+            scheduler.observe(observations(KSLC=hour * 60 + minute))
+        self.assertEqual(scheduler.issue_minute("KSLC"), 54)
+
+    def test_dense_after_due_time_then_sparse(self):
+        scheduler = self.make_scheduler()
+        scheduler.observe(observations(KSLC=54, KOGD=54))
+
+        # Both reported for this hour: wait until the next reports are due at 13:57
+        self.assertEqual(scheduler.next_delay(HOUR_START + 20 * 60), 600)
+        self.assertEqual(scheduler.next_delay(HOUR_START + 50 * 60), 7 * 60)
+        self.assertEqual(scheduler.due_stations(HOUR_START + 50 * 60), [])
+
+        # Past the due time with nothing new: dense, backing off while polls come back empty
+        due = HOUR_START + 60 * 60 + 57 * 60
+        self.assertEqual(scheduler.due_stations(due + 30), ["KSLC", "KOGD"])
+        self.assertEqual(scheduler.next_delay(due + 30), 60)
+        scheduler.observe(observations(KSLC=54, KOGD=54))
+        self.assertEqual(scheduler.next_delay(due + 90), 120)
+
+        # KSLC's report lands; KOGD is still missing, so polling stays dense
+        scheduler.observe(observations(KSLC=60 + 54, KOGD=54))
+        self.assertEqual(scheduler.due_stations(due + 150), ["KOGD"])
+        self.assertEqual(scheduler.next_delay(due + 150), 60)
+
+        # Once the dense window has passed, back to the sparse schedule
+        self.assertEqual(scheduler.next_delay(due + 700), 600)
+
+    def test_refresher_fetches_only_due_stations(self):
+        requested = []
+
+        def fetch(stations=None):
+            requested.append(stations)
+            return observations(KSLC=60 + 54, KOGD=54) if stations else observations(KSLC=54, KOGD=54)
+
+        scheduler = self.make_scheduler()
+        refresher = MetarRefresher(cache=MetarCache(fetch), scheduler=scheduler)
+        # KSLC reports at :52, KOGD at :54, so at 13:56 only KSLC's new report is due
+        scheduler._minutes["KSLC"].extend([52, 52])
+
+        due_stations = scheduler.due_stations
+        scheduler.due_stations = lambda now=None: due_stations(HOUR_START + 60 * 60 + 56 * 60)
+        self.assertEqual(refresher.refresh(), 1)
+        self.assertEqual(refresher.refresh(), 2)
+        self.assertEqual(requested, [None, ["KSLC"]])
+        self.assertEqual(refresher.snapshot[1]["KSLC"].observation_time.minute, 54)
+        self.assertEqual(refresher.snapshot[1]["KSLC"].observation_time.hour, 13)
+
+    def test_stuck_station_does_not_stop_full_fetches(self):
+        requested = []
+
+        def fetch(stations=None):
+            requested.append(stations)
+            # KAAA's report is overdue and never arrives; KBBB never reports at all
+            return observations(KAAA=54, KOGD=60 + 54)
+
+        scheduler = RefreshScheduler(stations=["KAAA", "KBBB", "KOGD"], dense_interval=60, sparse_interval=600,
+                                     dense_window=600, publish_lag=180)
+        due_stations = scheduler.due_stations
+        scheduler.due_stations = lambda now=None: due_stations(HOUR_START + 2 * 60 * 60 + 5 * 60)
+        clock = [0]
+        refresher = MetarRefresher(cache=MetarCache(fetch), scheduler=scheduler, clock=lambda: clock[0])
+        for clock[0] in (0, 60, 120, 600, 660):
+            refresher.refresh()
+
+        self.assertEqual(requested, [None, ["KAAA"], ["KAAA"], None, ["KAAA"]])
+
+    def test_observations_never_go_backwards(self):
+        scheduler = self.make_scheduler()
+        scheduler.observe(observations(KSLC=60 + 54))
+        self.assertEqual(scheduler.observe(observations(KSLC=54)), 0)
+        self.assertEqual(list(scheduler._minutes["KSLC"]), [54])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
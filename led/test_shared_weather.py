@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shared_weather.py and shared_metar.py
+Checks the LED service's published weather reads back and that bad stores are ignored
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from metar_cache import MetarCache
+from metar_data import MetarInfos
+from metar_refresher import MetarRefresher
+from shared_metar import get_shared_metar_data, publish_metar_infos
+from shared_weather import publish_weather, read_weather
+from test_airports import make_metar_info
+
+
+class TestSharedWeather(unittest.TestCase):
+    """Readers should get the LED service's latest snapshot without fetching"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "weather")
+
+        self.metar_infos = MetarInfos()
+        self.metar_infos["KSLC"] = make_metar_info("KSLC", gust=25)
+        self.metar_infos["KOGD"] = make_metar_info("KOGD", flight_category="IFR")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_versions(self):
+        records = [{"icaoId": "KOGD", "fltCat": "VFR"}]
+        publish_weather(records, 3, self.path, now=1000.0)
+
+        self.assertEqual(read_weather(self.path, now=1010.0), (3, records))
+        self.assertEqual(read_weather(self.path, since_version=3, now=1010.0), (3, None))
+        self.assertEqual(read_weather(self.path, since_version=2, now=1010.0), (3, records))
+
+    def test_unusable_stores_are_ignored(self):
+        self.assertEqual(read_weather(self.path), (None, None))
+
+        publish_weather([{"icaoId": "KOGD"}], 1, self.path, now=1000.0)
+        self.assertEqual(read_weather(self.path, max_age=60, now=2000.0), (None, None))
+
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+        self.assertEqual(read_weather(self.path, now=1010.0), (None, None))
+
+    def test_readers_use_published_snapshot(self):
+        publish_metar_infos(1, self.metar_infos, self.path)
+        with patch("shared_metar.get_metar_data") as get_metar_data:
+            metar_infos = get_shared_metar_data(self.path)
+            get_metar_data.assert_not_called()
+        self.assertEqual(sorted(metar_infos), ["KOGD", "KSLC"])
+        self.assertEqual(metar_infos["KOGD"].flightCategory, "IFR")
+        self.assertEqual(metar_infos["KSLC"].windGustSpeed, 25)
+
+        os.remove(self.path)
+        with patch("shared_metar.get_metar_data", return_value=self.metar_infos) as get_metar_data:
+            self.assertIs(get_shared_metar_data(self.path), self.metar_infos)
+            get_metar_data.assert_called_once()
+
+    def test_store_keeps_reported_values(self):
+        api_record = {
+            "icaoId": "KOGD", "fltCat": "VFR", "obsTime": 1756083240, "temp": 10.6, "dewp": -2.8,
+            "visib": "10+", "altim": 1017.4, "elev": 1362, "wdir": 350, "wspd": 10, "lat": 41.2, "lon": -112.01,
+            "rawOb": "KOGD 250054Z 35010KT 10SM FEW080 11/M03 A3004", "clouds": [{"cover": "FEW", "base": 8000}],
+        }
+        publish_metar_infos(1, MetarInfos.from_json([api_record]), self.path)
+        _version, (record,) = read_weather(self.path)
+
+        for key in ("temp", "dewp", "visib", "altim", "elev", "lat", "lon", "obsTime", "rawOb", "clouds", "fltCat"):
+            self.assertEqual(record[key], api_record[key], key)
+
+    def test_refresher_publishes_new_versions_only(self):
+        published = []
+        refresher = MetarRefresher(cache=MetarCache(lambda stations=None: self.metar_infos),
+                                   publish=lambda version, metar_infos: published.append(version))
+        refresher.scheduler.due_stations = lambda now=None: []
+        refresher.refresh()
+        refresher.refresh()
+        self.assertEqual(published, [1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Unit tests for warm_snapshot.py
+Checks the restart snapshot round-trips and that bad snapshots are ignored
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from frame_loop import FrameLoop
+from metar_data import MetarInfos
+from test_airports import make_metar_info
+from test_frame_engine import CountingStrip, make_leds
+from warm_snapshot import load_snapshot, save_snapshot, snapshot_saver
+
+
+class TestWarmSnapshot(unittest.TestCase):
+    """A saved snapshot should bring back the same frame and observations"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "snapshot")
+
+        self.metar_infos = MetarInfos()
+        self.metar_infos["KSLC"] = make_metar_info("KSLC", gust=25)
+        self.metar_infos["KOGD"] = make_metar_info("KOGD", flight_category="IFR", minute=58)
+        self.metar_infos["KOGD"].skyConditions = [{"cover": "OVC", "cloudBaseFt": 800}]
+        self.frame = bytes(range(6))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        save_snapshot(self.frame, self.metar_infos, self.path, now=1000.0)
+        frame, metar_infos = load_snapshot(2, self.path, now=1010.0)
+
+        self.assertEqual(frame, self.frame)
+        self.assertEqual(sorted(metar_infos), ["KOGD", "KSLC"])
+        for code, expected in self.metar_infos.items():
+            restored = metar_infos[code]
+            for field in ("flightCategory", "windDir", "windSpeed", "windGustSpeed", "tempC", "dewpointC",
+                          "vis", "skyConditions", "latitude", "longitude", "observation_time"):
+                self.assertEqual(getattr(restored, field), getattr(expected, field), f"{code} {field}")
+            self.assertAlmostEqual(restored.altimHg, expected.altimHg, places=6)
+
+    def test_unusable_snapshots_are_ignored(self):
+        self.assertEqual(load_snapshot(2, self.path), (None, None))
+
+        save_snapshot(self.frame, self.metar_infos, self.path, now=1000.0)
+        self.assertEqual(load_snapshot(3, self.path, now=1010.0), (None, None))
+        self.assertEqual(load_snapshot(2, self.path, max_age=60, now=2000.0), (None, None))
+
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+        self.assertEqual(load_snapshot(2, self.path, now=1010.0), (None, None))
+
+    def test_saver_publish_hook(self):
+        leds = make_leds()
+        frame_loop = FrameLoop(CountingStrip(len(leds)), leds)
+        save = snapshot_saver(frame_loop, self.path)
+
+        # Nothing shown yet: nothing to save
+        save(1, self.metar_infos)
+        self.assertFalse(os.path.exists(self.path))
+
+        frame_loop.tick(1000.0)
+        save(2, self.metar_infos)
+        frame, metar_infos = load_snapshot(len(leds), self.path)
+        self.assertEqual(frame, frame_loop.last_frame)
+        self.assertEqual(sorted(metar_infos), ["KOGD", "KSLC"])
+
+        # A failed save is logged, never raised into the refresher thread
+        with patch("warm_snapshot.save_snapshot", side_effect=ValueError("bad record")):
+            with self.assertLogs("warm_snapshot", "WARNING"):
+                save(3, self.metar_infos)
+
+    def test_frame_loop_last_frame_is_color_order(self):
+        leds = make_leds()
+        for use_engine in (True, False):
+            frame_loop = FrameLoop(CountingStrip(len(leds)), leds, use_engine=use_engine)
+            self.assertIsNone(frame_loop.last_frame)
+            frame_loop.tick(1000.0)
+            expected = bytes(channel for led in leds for channel in led.get_color(1000.0))
+            self.assertEqual(frame_loop.last_frame, expected)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Unit tests for weather_multicast.py
+Sends snapshots between a publisher and subscriber over loopback UDP
+"""
+
+import socket
+import time
+import unittest
+import zlib
+
+from metar_data import MetarInfos
+from test_airports import make_metar_info
+from weather_multicast import MulticastPublisher, MulticastSubscriber
+
+
+def make_metar_infos(codes, gust=None):
+    metar_infos = MetarInfos()
+    for code in codes:
+        metar_infos[code] = make_metar_info(code, gust=gust)
+    return metar_infos
+
+
+class TestWeatherMulticast(unittest.TestCase):
+    """Subscribers should track the publisher's snapshots from deltas and full resends"""
+
+    def setUp(self):
+        self.subscriber = MulticastSubscriber(group="127.0.0.1", port=0)
+        self.publisher = MulticastPublisher(group="127.0.0.1", port=self.subscriber.port)
+
+    def tearDown(self):
+        self.publisher.stop()
+        self.subscriber.stop()
+
+    def receive(self):
+        """Every datagram waiting on the subscriber's socket"""
+        datagrams = []
+        self.subscriber.sock.settimeout(0.2)
+        while True:
+            try:
+                datagrams.append(self.subscriber.sock.recv(65535))
+            except socket.timeout:
+                return datagrams
+
+    def test_full_snapshot_then_delta(self):
+        self.publisher.publish(1, make_metar_infos(["KSLC", "KOGD", "KDEN"]))
+        for datagram in self.receive():
+            self.subscriber.handle(datagram)
+        version, metar_infos = self.subscriber.snapshot
+        self.assertEqual(version, 1)
+        self.assertEqual(sorted(metar_infos), ["KDEN", "KOGD", "KSLC"])
+
+        changed = make_metar_infos(["KSLC", "KOGD", "KDEN"])
+        changed["KOGD"] = make_metar_info("KOGD", flight_category="IFR")
+        self.publisher.publish(2, changed)
+        datagrams = self.receive()
+        self.assertEqual(len(datagrams), 1)
+        self.assertEqual(self.subscriber.handle(datagrams[0]), 2)
+
+        version, metar_infos = self.subscriber.snapshot
+        self.assertEqual(sorted(metar_infos), ["KDEN", "KOGD", "KSLC"])
+        self.assertEqual(metar_infos["KOGD"].flightCategory, "IFR")
+
+    def test_large_snapshot_is_split(self):
+        self.publisher.max_datagram = 300
+        codes = [f"K{index:03d}" for index in range(200)]
+        self.publisher.publish(1, make_metar_infos(codes))
+        datagrams = self.receive()
+        self.assertGreater(len(datagrams), 1)
+        self.assertTrue(all(len(datagram) <= 300 for datagram in datagrams))
+
+        for datagram in reversed(datagrams):
+            self.subscriber.handle(datagram)
+        self.assertEqual(sorted(self.subscriber.snapshot[1]), codes)
+
+    def test_missed_delta_waits_for_full_snapshot(self):
+        self.publisher.publish(1, make_metar_infos(["KSLC"]))
+        self.receive()  # lost
+        self.publisher.publish(2, make_metar_infos(["KSLC"], gust=30))
+        for datagram in self.receive():
+            self.assertIsNone(self.subscriber.handle(datagram))
+        self.assertEqual(self.subscriber.snapshot, (0, None))
+
+        self.publisher.publish_full()
+        for datagram in self.receive():
+            self.subscriber.handle(datagram)
+        version, metar_infos = self.subscriber.snapshot
+        self.assertEqual(version, 1)
+        self.assertEqual(metar_infos["KSLC"].windGustSpeed, 30)
+
+        # Resending what the subscriber already has changes nothing
+        self.publisher.publish_full()
+        for datagram in self.receive():
+            self.assertIsNone(self.subscriber.handle(datagram))
+
+    def test_delta_carries_any_changed_field(self):
+        self.publisher.publish(1, make_metar_infos(["KSLC", "KOGD"]))
+        for datagram in self.receive():
+            self.subscriber.handle(datagram)
+
+        # Same observation time and category; only the visibility and weather differ
+        changed = make_metar_infos(["KSLC", "KOGD"])
+        changed["KOGD"].visibility = 2.5
+        changed["KOGD"].obs = "-RA BR"
+        self.publisher.publish(2, changed)
+        for datagram in self.receive():
+            self.subscriber.handle(datagram)
+
+        _version, metar_infos = self.subscriber.snapshot
+        self.assertEqual(metar_infos["KOGD"].vis, 2)
+        self.assertEqual(metar_infos["KOGD"].obs, "-RA BR")
+
+    def test_oversized_datagram_is_dropped(self):
+        self.subscriber.max_message = 1000
+        bomb = zlib.compress(b"[" + b" " * 100000 + b"]")
+        self.assertLess(len(bomb), 1000)
+        with self.assertLogs("weather_multicast", "WARNING"):
+            self.assertIsNone(self.subscriber.handle(bomb))
+        self.assertEqual(self.subscriber.snapshot, (0, None))
+
+    def test_subscriber_thread_applies_snapshots(self):
+        published = []
+        self.subscriber.publish = lambda version, metar_infos: published.append(version)
+        self.subscriber.start()
+        self.publisher.publish(1, make_metar_infos(["KSLC"]))
+
+        deadline = time.monotonic() + 2
+        while self.subscriber.snapshot[0] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.subscriber.snapshot[0], 1)
+        self.assertEqual(published, [1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
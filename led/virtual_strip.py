@@ -0,0 +1,68 @@
+import time
+from collections import deque
+
+from constants import LED_COUNT
+
+
+class VirtualStrip:
+    """In-memory stand-in for the NeoPixel strip, for running the LED code without hardware.
+
+    Lays pixels out like adafruit_pixelbuf (GRB byte order, `_post_brightness_buffer`)
+    so FrameBuffer takes the same bulk-copy path it does on the Pi. Every show()
+    is counted and timed with running totals (first and last show, shortest and
+    longest interval), so a long-running service doesn't grow; the pushed frames
+    are kept too, up to `max_frames` of the most recent ones (None keeps all, 0
+    keeps none).
+    """
+
+    byteorder = "GRB"
+
+    def __init__(self, count=LED_COUNT, max_frames=None):
+        self.count = count
+        self.max_frames = max_frames
+        self._bpp, self._byteorder, _has_white, _dotstar_mode = self.parse_byteorder(self.byteorder)
+        self._post_brightness_buffer = bytearray(count * self._bpp)
+        self._pre_brightness_buffer = None
+        self._offset = 0
+
+        self.show_count = 0
+        self.first_show_time = None
+        self.last_show_time = None
+        self.shortest_show_interval = None
+        self.longest_show_interval = None
+        self.frames = deque(maxlen=max_frames)
+
+    @staticmethod
+    def parse_byteorder(byteorder):
+        """Same contract as adafruit_pixelbuf.PixelBuf.parse_byteorder for RGB strips"""
+        return len(byteorder), (byteorder.index("R"), byteorder.index("G"), byteorder.index("B")), False, False
+
+    def __len__(self):
+        return self.count
+
+    def __setitem__(self, index, color):
+        offset = index * self._bpp
+        for channel, position in enumerate(self._byteorder):
+            self._post_brightness_buffer[offset + position] = int(color[channel])
+
+    def __getitem__(self, index):
+        offset = index * self._bpp
+        return tuple(self._post_brightness_buffer[offset + position] for position in self._byteorder)
+
+    def fill(self, color):
+        for index in range(self.count):
+            self[index] = color
+
+    def show(self):
+        now = time.monotonic()
+        self.show_count += 1
+        if self.last_show_time is None:
+            self.first_show_time = now
+        else:
+            interval = now - self.last_show_time
+            if self.shortest_show_interval is None or interval < self.shortest_show_interval:
+                self.shortest_show_interval = interval
+            if self.longest_show_interval is None or interval > self.longest_show_interval:
+                self.longest_show_interval = interval
+        self.last_show_time = now
+        self.frames.append(bytes(self._post_brightness_buffer))
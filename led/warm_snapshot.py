@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import WARM_SNAPSHOT_MAX_AGE, WARM_SNAPSHOT_PATH
+from metar_data import MetarInfos
+from shared_weather import SnapshotFormat
+
+logger = logging.getLogger(__name__)
+
+# Fields: LED count. Sections: the raw frame, then the observations as JSON records.
+_SNAPSHOT_FORMAT = SnapshotFormat(b"MWX1", "I", 2)
+
+
+def save_snapshot(frame, metar_infos, path=WARM_SNAPSHOT_PATH, now=None):
+    """Write the last shown frame (flat RGB bytes) and its weather data to `path`.
+
+    The file is a packed header, the raw frame, then the observations as API
+    style JSON records. It is renamed into place once complete, so a crash
+    mid-write never leaves a torn snapshot behind.
+    """
+    frame = bytes(frame)
+    records = json.dumps(
+        [metar_info.to_record() for metar_info in metar_infos.values()], separators=(",", ":")
+    ).encode()
+    _SNAPSHOT_FORMAT.write(path, (len(frame) // 3,), (frame, records), now)
+
+
+def snapshot_saver(frame_loop, path=WARM_SNAPSHOT_PATH):
+    """A publish hook that saves `frame_loop`'s last shown frame with each new weather snapshot.
+
+    It runs on the thread that publishes (the refresher or the multicast
+    subscriber), so serializing every station never stalls the render thread.
+    The frame may still be from the previous snapshot; after a restart the
+    frame loop redraws from the restored weather on its first tick. Errors are
+    logged, never raised into the publishing thread.
+    """
+    def save(version, metar_infos):
+        frame = frame_loop.last_frame
+        if frame is None:
+            return
+        try:
+            save_snapshot(frame, metar_infos, path)
+        except Exception as e:
+            logger.warning(f"Could not save warm snapshot for weather v{version}: {e}")
+    return save
+
+
+def load_snapshot(led_count, path=WARM_SNAPSHOT_PATH, max_age=WARM_SNAPSHOT_MAX_AGE, now=None):
+    """Read a snapshot written by save_snapshot. Returns (frame, MetarInfos), or (None, None).
+
+    Snapshots that are missing, damaged, for a different LED count or older
+    than `max_age` seconds are ignored.
+    """
+    try:
+        saved_at, (count,), (frame, records) = _SNAPSHOT_FORMAT.read(path)
+    except FileNotFoundError:
+        return None, None
+    except OSError as e:
+        logger.warning(f"Could not read warm snapshot {path}: {e}")
+        return None, None
+    except ValueError as e:
+        logger.warning(f"Ignoring warm snapshot {path}: {e}")
+        return None, None
+
+    age = (time.time() if now is None else now) - saved_at
+    if count != led_count or age > max_age:
+        logger.info(f"Ignoring warm snapshot for {count} LEDs from {age:.0f}s ago")
+        return None, None
+
+    try:
+        metar_infos = MetarInfos.from_json(json.loads(records))
+    except ValueError as e:
+        logger.warning(f"Ignoring weather in warm snapshot {path}: {e}")
+        metar_infos = None
+    return frame, metar_infos
@@ -0,0 +1,242 @@
+import ipaddress
+import json
+import logging
+import random
+import socket
+import struct
+import threading
+import zlib
+
+from constants import (
+    MULTICAST_FULL_INTERVAL,
+    MULTICAST_GROUP,
+    MULTICAST_MAX_DATAGRAM,
+    MULTICAST_MAX_MESSAGE,
+    MULTICAST_PORT,
+    MULTICAST_TTL,
+)
+from metar_data import MetarInfos
+
+logger = logging.getLogger(__name__)
+
+# Each datagram is zlib-compressed JSON:
+#   e: publisher epoch (new on every publisher start, since versions restart then)
+#   v: snapshot version, b: version the delta applies to (null for a full snapshot)
+#   p, n: part number and part count, r: API v4.0 style records
+
+
+def _is_multicast(address):
+    return ipaddress.ip_address(address).is_multicast
+
+
+class MulticastPublisher:
+    """Sends each weather snapshot to subscribing maps over UDP multicast.
+
+    Every new version goes out as a delta holding only the stations whose
+    record changed in any field since the previous one, split into as many
+    datagrams as it takes to keep each under `max_datagram` bytes. The whole snapshot is
+    resent every `full_interval` seconds, so subscribers that start late or
+    lose a datagram catch up. Sending is best effort: a send error is logged
+    and never reaches the refresher.
+    """
+
+    def __init__(self, group=MULTICAST_GROUP, port=MULTICAST_PORT, ttl=MULTICAST_TTL,
+                 full_interval=MULTICAST_FULL_INTERVAL, max_datagram=MULTICAST_MAX_DATAGRAM):
+        self.address = (group, port)
+        self.full_interval = full_interval
+        self.max_datagram = max_datagram
+        self.epoch = random.getrandbits(32)
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        if _is_multicast(group):
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._records = None  # code -> record, as last published
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def publish(self, version, metar_infos):
+        """Send `version` as a delta from the last published snapshot (or in full if it's the first)"""
+        records = {code: metar_info.to_record() for code, metar_info in metar_infos.items()}
+        with self._lock:
+            if self._records is None:
+                base = None
+                changed = list(records.values())
+            else:
+                base = self._version
+                changed = [record for code, record in records.items() if self._records.get(code) != record]
+            self._version = version
+            self._records = records
+            self._send(version, base, changed)
+
+    def publish_full(self):
+        """Resend the current snapshot in full"""
+        with self._lock:
+            if self._records is not None:
+                self._send(self._version, None, list(self._records.values()))
+
+    def _send(self, version, base, records):
+        groups = self._split(records)
+        try:
+            for part, group in enumerate(groups):
+                self.sock.sendto(self._encode(version, base, part, len(groups), group), self.address)
+        except OSError as e:
+            logger.warning(f"Could not multicast weather v{version}: {e}")
+            return
+        kind = "full snapshot" if base is None else f"delta from v{base}"
+        logger.info(f"Multicast weather v{version} ({kind}, {len(records)} stations, {len(groups)} datagrams)")
+
+    def _split(self, records):
+        """Group records so each group's datagram fits in max_datagram bytes"""
+        if len(records) <= 1 or len(self._encode(0, 0, 0, 0, records)) <= self.max_datagram:
+            return [records]
+        middle = len(records) // 2
+        return self._split(records[:middle]) + self._split(records[middle:])
+
+    def _encode(self, version, base, part, parts, records):
+        message = {"e": self.epoch, "v": version, "b": base, "p": part, "n": parts, "r": records}
+        return zlib.compress(json.dumps(message, separators=(",", ":")).encode())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="weather-multicast", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.sock.close()
+
+    def _run(self):
+        while not self._stop_event.wait(self.full_interval):
+            self.publish_full()
+
+
+class MulticastSubscriber:
+    """Takes weather from a MulticastPublisher instead of fetching it.
+
+    Stands in for MetarRefresher: `snapshot` is the latest (version, MetarInfos)
+    pair, with its own version counter. Deltas are applied only on top of the
+    version they were made from; after a lost datagram or a publisher restart
+    the subscriber keeps its data and waits for the next full snapshot. A
+    datagram that would decompress to more than `max_message` bytes is dropped.
+    """
+
+    def __init__(self, group=MULTICAST_GROUP, port=MULTICAST_PORT, interface="0.0.0.0", publish=None,
+                 max_message=MULTICAST_MAX_MESSAGE):
+        self.publish = publish
+        self.max_message = max_message
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if _is_multicast(group):
+            self.sock.bind(("", port))
+            membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        else:
+            # A unicast address (e.g. 127.0.0.1) to listen on, for testing without multicast
+            self.sock.bind((group, port))
+        self.sock.settimeout(1.0)
+        self.port = self.sock.getsockname()[1]
+
+        self._snapshot = (0, None)
+        # Publisher (epoch, version) the current snapshot matches, and the parts
+        # received so far of the message being assembled
+        self._source = None
+        self._pending_key = None
+        self._pending_parts = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def snapshot(self):
+        """Latest (version, MetarInfos) pair. Version 0 means no data yet."""
+        return self._snapshot
+
+    def seed(self, metar_infos):
+        """Show data from elsewhere (e.g. a warm-restart snapshot) until the first snapshot arrives"""
+        version = self._snapshot[0] + 1
+        self._snapshot = (version, metar_infos)
+        logger.info(f"Seeded weather snapshot v{version} with {len(metar_infos)} airports")
+        return version
+
+    def handle(self, datagram):
+        """Apply one received datagram. Returns the new snapshot version, or None if nothing changed."""
+        try:
+            # Datagrams come from anyone on the network: never inflate one past max_message
+            decompressor = zlib.decompressobj()
+            data = decompressor.decompress(datagram, self.max_message)
+            if decompressor.unconsumed_tail or not decompressor.eof:
+                raise ValueError(f"message over {self.max_message} bytes or incomplete")
+            message = json.loads(data)
+            epoch, version, base = message["e"], message["v"], message["b"]
+            part, parts, records = message["p"], message["n"], message["r"]
+        except (zlib.error, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed weather datagram: {e}")
+            return None
+
+        key = (epoch, version, base)
+        if key != self._pending_key:
+            self._pending_key = key
+            self._pending_parts = {}
+        self._pending_parts[part] = records
+        if len(self._pending_parts) < parts:
+            return None
+        records = [record for index in range(parts) for record in self._pending_parts.get(index, [])]
+        self._pending_key = None
+        self._pending_parts = {}
+
+        current_version, current_infos = self._snapshot
+        if base is None:
+            if self._source == (epoch, version):
+                return None
+            metar_infos = MetarInfos.from_json(records)
+        elif self._source == (epoch, base) and current_infos is not None:
+            metar_infos = MetarInfos()
+            metar_infos.update(current_infos)
+            metar_infos.update(MetarInfos.from_json(records))
+        else:
+            logger.debug(f"Skipping weather delta v{base}->v{version}; waiting for a full snapshot")
+            return None
+
+        self._source = (epoch, version)
+        snapshot_version = current_version + 1
+        self._snapshot = (snapshot_version, metar_infos)
+        logger.info(f"Received weather v{version} as snapshot v{snapshot_version} "
+                    f"({len(records)} stations updated)")
+        if self.publish is not None:
+            self.publish(snapshot_version, metar_infos)
+        return snapshot_version
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="weather-subscriber", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.sock.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                datagram = self.sock.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if not self._stop_event.is_set():
+                    logger.error(f"Weather subscriber socket failed: {e}")
+                return
+            try:
+                self.handle(datagram)
+            except Exception as e:
+                logger.error(f"Could not apply weather datagram: {e}")
@@ -6,6 +6,8 @@ import datetime
 import json
 import logging
 
+from shared_weather import read_weather
+
 logger = logging.getLogger(__name__)
 
 class AirportData:
@@ -246,6 +248,15 @@ class AirportData:
         return False
 
     def get_content(self):
+        # The LED service fetches this station along with the map's airports and
+        # publishes it to the shared store; only call the API when it isn't running
+        version, records = read_weather()
+        if records is not None:
+            station_records = [record for record in records if record.get("icaoId") == self.airport_code]
+            if station_records:
+                logger.debug(f"Using shared weather v{version} for {self.airport_code}")
+                return station_records
+
         print("Fetching fresh airport data...")
         try:
             url = self.URL + self.airport_code
@@ -3,7 +3,7 @@ import time
 import adafruit_ssd1306
 import board
 import digitalio
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 
 from airport import AirportData
 from config import (
@@ -25,6 +25,7 @@ class OLEDDraw:
         self.padding = 0
         self.top = self.padding
         self.bottom = self.height - self.padding
+        self.body_top = self.top + 12
 
         i2c = board.I2C()
         self.oled = adafruit_ssd1306.SSD1306_I2C(
@@ -72,14 +73,27 @@ class OLEDDraw:
         self.oled.show()
         self.wait(wait)
 
-    def scroll_text(self, display_text, header):
-        x = 0
+    def render_strip(self, display_text):
+        """Rasterise the body text once into a 1-bit strip the height of the screen.
+
+        The strip is padded by a screen width so every scroll position can be
+        cropped from it without running off the end.
+        """
         width, _ = self.font_large.getsize(display_text)
-        # Start at negative half the screen so that the scrolling text starts at the middle of the screen
+        strip = Image.new("1", (width + self.width, self.height))
+        ImageDraw.Draw(strip).text((0, self.body_top), display_text, font=self.font_large, fill=255)
+        return strip
+
+    def scroll_text(self, display_text, header):
+        # The header and the text are each rendered once; every step just ORs the
+        # header with the next window cropped from the text strip
+        header_image = Image.new("1", (self.width, self.height))
+        ImageDraw.Draw(header_image).text((0, self.top), header, font=self.font_small, fill=255)
+        strip = self.render_strip(display_text)
+        width = strip.width - self.width
         for i in range(0, (width - self.width) + self.border, 4):
-            self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
-            self.draw_header(0, header)
-            self.draw_body((x - i, self.top + 12), display_text)
+            window = strip.crop((i, 0, i + self.width, self.height))
+            self.image.paste(ImageChops.logical_or(header_image, window))
             if i == 0:
                 self.show(1) 
             else:
@@ -111,6 +125,6 @@ class OLEDDraw:
             else:
                 self.draw.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
                 self.draw_header(x + self.padding, header)
-                self.draw_body((x + self.padding, self.top + 12), display_text)
+                self.draw_body((x + self.padding, self.body_top), display_text)
                 # self.image.show()
                 self.show(self.cycle_time)
@@ -0,0 +1,105 @@
+import json
+import logging
+import os
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+# The LED service publishes every new weather snapshot here; the OLED and the
+# diagnostic scripts read it instead of calling aviationweather.gov themselves.
+# /run is cleared on reboot, so the store never outlives the boot it was written in.
+SHARED_WEATHER_PATH = '/run/metarmap_weather'
+# Readers treat an older store as missing (the LED service isn't running or
+# can't reach the API) and fetch for themselves (seconds)
+SHARED_WEATHER_MAX_AGE = 60 * 60 * 2
+
+
+class SnapshotFormat:
+    """A small binary snapshot file: a packed header followed by byte sections.
+
+    The header holds a 4-byte magic, a format version, when the file was
+    written (epoch seconds), the caller's own `fields` (struct format
+    characters) and the length of each of the `section_count` sections. Files
+    are written to a temporary file and renamed into place, so a reader (or a
+    crash mid-write) never sees a torn one.
+    """
+
+    def __init__(self, magic, fields, section_count, format_version=1):
+        self.magic = magic
+        self.format_version = format_version
+        self.field_count = len(struct.unpack(f"<{fields}", bytes(struct.calcsize(f"<{fields}"))))
+        self.section_count = section_count
+        self.header = struct.Struct(f"<4sHd{fields}{'I' * section_count}")
+
+    def write(self, path, fields, sections, now=None):
+        header = self.header.pack(
+            self.magic, self.format_version, time.time() if now is None else now,
+            *fields, *(len(section) for section in sections)
+        )
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            for section in sections:
+                f.write(section)
+        os.replace(temp_path, path)
+
+    def read(self, path, sections=True):
+        """(written at, fields, sections) from `path`; sections is None when `sections` is False.
+
+        Raises OSError when the file can't be read and ValueError when it is
+        not in this format or is truncated.
+        """
+        with open(path, "rb") as f:
+            try:
+                header = self.header.unpack(f.read(self.header.size))
+            except struct.error as e:
+                raise ValueError(f"truncated header: {e}")
+            magic, format_version, written_at = header[:3]
+            if magic != self.magic or format_version != self.format_version:
+                raise ValueError("unrecognized snapshot format")
+            fields = header[3:3 + self.field_count]
+            if not sections:
+                return written_at, fields, None
+
+            lengths = header[3 + self.field_count:]
+            data = [f.read(length) for length in lengths]
+            if [len(section) for section in data] != list(lengths) or f.read(1):
+                raise ValueError("truncated snapshot")
+        return written_at, fields, data
+
+
+# Fields: snapshot version. Sections: API v4.0 style JSON records.
+_STORE_FORMAT = SnapshotFormat(b"MWS1", "Q", 1)
+
+
+def publish_weather(records, version, path=SHARED_WEATHER_PATH, now=None):
+    """Write `records` (API v4.0 style METAR JSON records) to the shared store as `version`"""
+    data = json.dumps(records, separators=(",", ":")).encode()
+    _STORE_FORMAT.write(path, (version,), (data,), now)
+
+
+def read_weather(path=SHARED_WEATHER_PATH, max_age=SHARED_WEATHER_MAX_AGE, since_version=None, now=None):
+    """Read the shared store. Returns (version, records), or (None, None) if there is no usable store.
+
+    With `since_version`, a store still at that version returns (version, None)
+    after reading only the header. Versions restart when the LED service does,
+    so compare them for equality, not order.
+    """
+    try:
+        published_at, (version,), _ = _STORE_FORMAT.read(path, sections=False)
+        age = (time.time() if now is None else now) - published_at
+        if age > max_age:
+            logger.info(f"Ignoring shared weather v{version} from {age:.0f}s ago")
+            return None, None
+        if version == since_version:
+            return version, None
+
+        # Re-read in full; if the store was replaced in between, this is the newer one
+        _published_at, (version,), (data,) = _STORE_FORMAT.read(path)
+        return version, json.loads(data)
+    except FileNotFoundError:
+        return None, None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read shared weather {path}: {e}")
+        return None, None